@@ -0,0 +1,299 @@
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from educator import HydroGameEngine
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.environ.get("HYDRO_ANALYTICS_DB", os.path.join("runtime", "analytics.sqlite3"))
+
+# Actions tracked as their own columns; anything else is folded into actions_total only.
+ACTION_COLUMNS = (
+    "toggle_light",
+    "normalize_ec",
+    "normalize_ph",
+    "move_inside",
+    "move_outside",
+    "refill_water",
+    "dehumidify",
+    "spray_water",
+    "next_stage",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    finished_at INTEGER NOT NULL,
+    city TEXT NOT NULL,
+    month TEXT NOT NULL,
+    crop TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    health REAL NOT NULL,
+    yield_kg REAL NOT NULL,
+    actions_total INTEGER NOT NULL,
+    {action_columns},
+    prompts_raised INTEGER NOT NULL,
+    prompts_missed INTEGER NOT NULL,
+    miss_rate REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_prompts (
+    run_id TEXT NOT NULL,
+    prompt_key TEXT NOT NULL,
+    raised INTEGER NOT NULL,
+    missed INTEGER NOT NULL,
+    PRIMARY KEY (run_id, prompt_key)
+);
+CREATE INDEX IF NOT EXISTS runs_by_condition ON runs (city, month, crop);
+""".format(action_columns=",\n    ".join(f"action_{a} INTEGER NOT NULL DEFAULT 0" for a in ACTION_COLUMNS))
+
+
+def connect(path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def run_record(eng: HydroGameEngine, outcome: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+    """Flatten a finished engine into a single analytics row."""
+    with eng._lock:
+        result = eng.calculate_yield()
+        actions = dict(eng.action_counts)
+        prompts = {key: dict(stats) for key, stats in eng.prompt_stats.items()}
+        record: Dict[str, Any] = {
+            "run_id": run_id or str(uuid.uuid4()),
+            "finished_at": int(time.time() * 1000),
+            "city": eng.city,
+            "month": eng.month,
+            "crop": eng.crop,
+            "outcome": outcome,
+            "day": int(eng.day),
+            "stage": eng.stage,
+            "health": float(result["health"]),
+            "yield_kg": float(result["yield_kg"]),
+        }
+
+    raised = sum(s["raised"] for s in prompts.values())
+    missed = sum(s["missed"] for s in prompts.values())
+
+    record["actions_total"] = sum(actions.values())
+    for action_id in ACTION_COLUMNS:
+        record[f"action_{action_id}"] = int(actions.get(action_id, 0))
+    record["prompts_raised"] = raised
+    record["prompts_missed"] = missed
+    record["miss_rate"] = round(missed / raised, 4) if raised else 0.0
+    record["prompts"] = prompts
+    return record
+
+
+class AnalyticsWriter:
+    """
+    Background writer that batches finished runs into SQLite.
+
+    Engines hand records over via submit(); a daemon thread flushes them
+    either when batch_size is reached or every flush_interval seconds. A
+    failed write (locked database, full disk) is logged and retried at the
+    next flush; after max_attempts failures the batch is dropped.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        batch_size: int = 50,
+        flush_interval: float = 5.0,
+        max_attempts: int = 3,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="HydroAnalytics", daemon=True)
+            self._thread.start()
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def hook(self, eng: HydroGameEngine, outcome: str) -> None:
+        """Finish hook: attach with eng.add_finish_hook(writer.hook)."""
+        self.submit(run_record(eng, outcome))
+
+    def hook_for(self, run_id: str) -> Callable[[HydroGameEngine, str], None]:
+        """Finish hook exporting under a fixed run_id (the session id), so a run
+        continued on a new engine replaces its earlier row instead of adding one."""
+        def hook(eng: HydroGameEngine, outcome: str) -> None:
+            self.submit(run_record(eng, outcome, run_id=run_id))
+
+        return hook
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush anything queued and stop the writer thread."""
+        thread = self._thread
+        if not thread or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(timeout=timeout)
+
+    def _loop(self) -> None:
+        conn: Optional[sqlite3.Connection] = None
+        batch: List[Dict[str, Any]] = []
+        attempts = 0
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+
+        try:
+            while not stopping:
+                timeout = max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                    if item is None:
+                        stopping = True
+                    else:
+                        batch.append(item)
+                except queue.Empty:
+                    pass
+
+                if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    try:
+                        if conn is None:
+                            conn = connect(self.path)
+                        write_batch(conn, batch)
+                        batch, attempts = [], 0
+                    except Exception:
+                        attempts += 1
+                        if attempts >= self.max_attempts:
+                            log.exception("Dropping %d analytics records after %d failed writes", len(batch), attempts)
+                            batch, attempts = [], 0
+                        else:
+                            log.exception("Analytics write failed (attempt %d), retrying", attempts)
+                if time.monotonic() >= deadline:
+                    deadline = time.monotonic() + self.flush_interval
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def write_batch(conn: sqlite3.Connection, batch: List[Dict[str, Any]]) -> None:
+    columns = [c for c in batch[0] if c != "prompts"]
+    placeholders = ", ".join("?" for _ in columns)
+    run_rows = [tuple(rec[c] for c in columns) for rec in batch]
+    prompt_rows = [
+        (rec["run_id"], key, stats["raised"], stats["missed"])
+        for rec in batch
+        for key, stats in rec["prompts"].items()
+    ]
+
+    with conn:
+        # A re-exported run replaces its earlier prompt rows as a whole.
+        conn.executemany("DELETE FROM run_prompts WHERE run_id = ?", [(rec["run_id"],) for rec in batch])
+        conn.executemany(
+            f"INSERT OR REPLACE INTO runs ({', '.join(columns)}) VALUES ({placeholders})",
+            run_rows,
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO run_prompts (run_id, prompt_key, raised, missed) VALUES (?, ?, ?, ?)",
+            prompt_rows,
+        )
+
+
+# ---------------------- Offline aggregation ----------------------
+
+
+def summarize(conn: sqlite3.Connection) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Return (per-condition summary, per-prompt miss rates) aggregated in SQL."""
+    conn.row_factory = sqlite3.Row
+
+    conditions = conn.execute(
+        """
+        SELECT city, month, crop,
+               COUNT(*) AS runs,
+               SUM(outcome = 'completed') AS completed,
+               SUM(outcome = 'dead') AS dead,
+               SUM(outcome = 'abandoned') AS abandoned,
+               SUM(outcome = 'paused') AS paused,
+               ROUND(AVG(health), 2) AS avg_health,
+               ROUND(AVG(yield_kg), 3) AS avg_yield_kg,
+               ROUND(AVG(actions_total), 1) AS avg_actions,
+               ROUND(CAST(SUM(prompts_missed) AS REAL) / MAX(SUM(prompts_raised), 1), 4) AS miss_rate
+        FROM runs
+        GROUP BY city, month, crop
+        ORDER BY miss_rate DESC, avg_health ASC
+        """
+    ).fetchall()
+
+    prompts = conn.execute(
+        """
+        SELECT r.city, r.month, r.crop, p.prompt_key,
+               SUM(p.raised) AS raised,
+               SUM(p.missed) AS missed,
+               ROUND(CAST(SUM(p.missed) AS REAL) / MAX(SUM(p.raised), 1), 4) AS miss_rate
+        FROM run_prompts p JOIN runs r ON r.run_id = p.run_id
+        GROUP BY r.city, r.month, r.crop, p.prompt_key
+        ORDER BY miss_rate DESC, raised DESC
+        """
+    ).fetchall()
+
+    return [dict(r) for r in conditions], [dict(r) for r in prompts]
+
+
+def _print_table(rows: List[Dict[str, Any]], limit: int) -> None:
+    if not rows:
+        print("(no runs recorded)")
+        return
+    headers = list(rows[0].keys())
+    shown = rows[:limit]
+    widths = [max(len(h), *(len(str(r[h])) for r in shown)) for h in headers]
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for r in shown:
+        print("  ".join(str(r[h]).ljust(w) for h, w in zip(headers, widths)))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Summarize exported simulation runs.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="analytics database path")
+    parser.add_argument("--limit", type=int, default=20, help="rows to show per table")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        conditions, prompts = summarize(conn)
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps({"conditions": conditions, "prompts": prompts}, indent=2))
+        return
+
+    print("Conditions (hardest first):")
+    _print_table(conditions, args.limit)
+    print()
+    print("Prompt miss rates:")
+    _print_table(prompts, args.limit)
+
+
+if __name__ == "__main__":
+    main()
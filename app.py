@@ -1,38 +1,248 @@
 from __future__ import annotations
+import atexit
+import os
+import threading
 import time
 import uuid
 from typing import Any, Dict, Tuple, Optional
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, g, request, jsonify, send_from_directory
+from werkzeug.middleware.proxy_fix import ProxyFix
 
-from educator import HydroGameEngine
+from analytics import AnalyticsWriter, run_record
+from assets import AssetManifest
+from classroom import Classroom, ClassroomRegistry
+from educator import BASE_TICK_MINUTES, HydroGameEngine, apply_action
+from engine_pool import EnginePool
+from expiry import PromptExpiryScheduler
+from leaderboard import BoardKey, Leaderboard
+from planner import DEFAULT_BEAM_WIDTH, load_plan
+from ratelimit import KeyedRateLimiter, SlotCounter, TokenBucket
 
 app = Flask(__name__, static_folder="static", static_url_path="")
 
+# Number of reverse proxies in front of the app (1 on Render) so the client IP is trusted.
+TRUSTED_PROXIES = int(os.environ.get("HYDRO_TRUSTED_PROXIES", "0"))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
 SESSIONS: Dict[str, Dict[str, Any]] = {}
 
+# Fingerprinted build from build_static.py (falls back to plain static/ when absent)
+ASSETS = AssetManifest()
+
+ANALYTICS = AnalyticsWriter()
+ANALYTICS.start()
+atexit.register(ANALYTICS.close)
+
+CLASSROOMS = ClassroomRegistry()
+
+LEADERBOARD = Leaderboard()
+
+# Applies missed-prompt penalties server-side, so backgrounded tabs are still scored.
+EXPIRY = PromptExpiryScheduler()
+EXPIRY.start()
+
+# Wall-clock seconds per tick for each speed tier
+SPEED_TIERS = {"slow": 5.0, "normal": 2.5, "fast": 1.0, "turbo": 0.25}
+DEFAULT_SPEED = "normal"
+
+# Simulated minutes per tick a session may choose
+TICK_RESOLUTIONS = (15, 30, 60, 120)
+
+# Ready-built engines for every city/month/crop and time step; /start clones one.
+ENGINES = EnginePool()
+ENGINES.warm(TICK_RESOLUTIONS)
+
+# Server-wide cap on simulated ticks per second across all sessions
+TICK_BUDGET = TokenBucket(
+    rate=float(os.environ.get("HYDRO_TICKS_PER_SEC", "200")),
+    capacity=float(os.environ.get("HYDRO_TICK_BURST", "400")),
+)
+
+# ---------- Admission control ----------
+
+# Requests/sec (and burst) allowed per client IP across all API endpoints. A whole
+# class often shares one school NAT address, so this sits well above the per-session
+# limits below, which do the real per-learner limiting.
+IP_LIMIT = KeyedRateLimiter(
+    rate=float(os.environ.get("HYDRO_IP_RATE", "100")),
+    capacity=float(os.environ.get("HYDRO_IP_BURST", "200")),
+)
+# New simulations per client IP
+START_LIMIT = KeyedRateLimiter(
+    rate=float(os.environ.get("HYDRO_START_RATE", "0.2")),
+    capacity=float(os.environ.get("HYDRO_START_BURST", "5")),
+)
+# New simulations per classroom (used instead of START_LIMIT when joining a class)
+CLASS_START_LIMIT = KeyedRateLimiter(
+    rate=float(os.environ.get("HYDRO_CLASS_START_RATE", "1")),
+    capacity=float(os.environ.get("HYDRO_CLASS_START_BURST", "60")),
+)
+# Per-session limits; the client polls /status every 2 s
+ACTION_LIMIT = KeyedRateLimiter(
+    rate=float(os.environ.get("HYDRO_ACTION_RATE", "5")),
+    capacity=float(os.environ.get("HYDRO_ACTION_BURST", "10")),
+)
+STATUS_LIMIT = KeyedRateLimiter(
+    rate=float(os.environ.get("HYDRO_STATUS_RATE", "2")),
+    capacity=float(os.environ.get("HYDRO_STATUS_BURST", "5")),
+)
+
+# Engines with a running tick loop
+ENGINE_SLOTS = SlotCounter(int(os.environ.get("HYDRO_MAX_ENGINES", "200")))
+
+# API requests in flight before /status polls are shed (gunicorn runs 16 threads)
+INFLIGHT = SlotCounter(int(os.environ.get("HYDRO_SHED_STATUS_AT", "12")))
+
+# Sessions not heard from for this long (closed tab, abandoned pause) are stopped
+# and exported as abandoned, instead of playing on with every prompt missed.
+IDLE_TIMEOUT_SEC = float(os.environ.get("HYDRO_IDLE_TIMEOUT_SEC", "300"))
+
+API_ENDPOINTS = {
+    "start",
+    "status",
+    "action",
+    "pause",
+    "resume",
+    "resume_from_snapshot",
+    "restart",
+    "create_classroom",
+    "classroom_summary",
+    "leaderboard",
+    "leaderboard_rank",
+    "plan",
+}
+
 
 def make_sid() -> str:
     return str(uuid.uuid4())
 
 
-def get_session_or_400() -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[Any, int]]]:
-    """Return (session, error_response). If invalid/missing SID, session is None and error_response is set."""
+def request_sid() -> Optional[str]:
     sid = request.args.get("sid")
     if not sid:
         data = request.get_json(silent=True) or {}
         sid = data.get("sid")
+    return sid
 
-    if not sid or sid not in SESSIONS:
+
+def get_session_or_400() -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[Any, int]]]:
+    """Return (session, error_response). If invalid/missing SID, session is None and error_response is set."""
+    sid = request_sid()
+
+    sess = SESSIONS.get(sid) if sid else None
+    if sess is None:
         return None, (jsonify(error="Invalid or missing session id"), 400)
 
-    return SESSIONS[sid], None
+    sess["last_seen"] = int(time.time() * 1000)
+    return sess, None
 
 
 def required_action_from_engine(engine: HydroGameEngine) -> Any:
     return engine.active_prompt
 
 
+def parse_clock_options(data: Dict[str, Any]) -> Tuple[Optional[Tuple[str, int]], Optional[Tuple[Any, int]]]:
+    """Return ((speed_tier, tick_minutes), error_response) from a request body."""
+    speed = data.get("speed") or DEFAULT_SPEED
+    if speed not in SPEED_TIERS:
+        return None, (jsonify(error=f"speed must be one of {sorted(SPEED_TIERS)}"), 400)
+
+    try:
+        resolution = int(data.get("resolution") or BASE_TICK_MINUTES)
+    except (TypeError, ValueError):
+        resolution = -1
+    if resolution not in TICK_RESOLUTIONS:
+        return None, (jsonify(error=f"resolution must be one of {list(TICK_RESOLUTIONS)}"), 400)
+
+    return (speed, resolution), None
+
+
+def run_engine(sess: Dict[str, Any]) -> bool:
+    """Start (or keep) the session's tick loop; False when every engine slot is taken."""
+    eng: HydroGameEngine = sess["engine"]
+    if eng.done:
+        return True  # harvested or dead: nothing left to run
+    if not sess.get("slot"):
+        if not ENGINE_SLOTS.try_acquire():
+            return False
+        sess["slot"] = True
+        eng.add_finish_hook(lambda e, outcome: release_slot(sess))
+
+    eng.start_simulation(speed=SPEED_TIERS[sess["speed"]], tick_budget=TICK_BUDGET)
+    return True
+
+
+def release_slot(sess: Dict[str, Any]) -> None:
+    if sess.pop("slot", False):
+        ENGINE_SLOTS.release()
+
+
+def end_session(sid: str, sess: Dict[str, Any], finish: bool = True) -> None:
+    """Stop the engine (its finish hooks export the run unless finish=False) and forget the session."""
+    try:
+        sess["engine"].stop_simulation(finish=finish)
+    except Exception:
+        pass
+    release_slot(sess)
+
+    room = CLASSROOMS.get(sess.get("classroom"))
+    if room:
+        room.leave(sid)
+    if SESSIONS.get(sid) is sess:
+        del SESSIONS[sid]
+
+
+def reap_idle_sessions() -> int:
+    """End every session idle for longer than IDLE_TIMEOUT_SEC; returns how many."""
+    cutoff = int((time.time() - IDLE_TIMEOUT_SEC) * 1000)
+    idle = [(sid, sess) for sid, sess in list(SESSIONS.items()) if sess.get("last_seen", 0) < cutoff]
+    for sid, sess in idle:
+        eng: HydroGameEngine = sess["engine"]
+        if eng.paused and not eng.done:
+            # The learner may come back and continue from their snapshot (same
+            # sid, so the final export replaces this row): not abandoned yet.
+            ANALYTICS.submit(run_record(eng, "paused", run_id=sid))
+            end_session(sid, sess, finish=False)
+        else:
+            end_session(sid, sess)
+    return len(idle)
+
+
+def _reap_idle_loop() -> None:
+    while True:
+        time.sleep(min(60.0, IDLE_TIMEOUT_SEC / 4))
+        reap_idle_sessions()
+
+
+REAPER = threading.Thread(target=_reap_idle_loop, name="HydroIdleReaper", daemon=True)
+REAPER.start()
+
+
+def admit_start(room: Optional[Classroom]) -> Optional[Tuple[Any, int]]:
+    """Take a start token for a new engine; returns the 429 response when out of tokens."""
+    # A class starting together shares one NAT address, so it is admitted per class.
+    if room:
+        if not CLASS_START_LIMIT.allow(room.code):
+            return too_many_requests(CLASS_START_LIMIT)
+    elif not START_LIMIT.allow(request.remote_addr or "unknown"):
+        return too_many_requests(START_LIMIT)
+    return None
+
+
+def too_many_requests(limiter: KeyedRateLimiter) -> Tuple[Any, int]:
+    resp = jsonify(error="Too many requests")
+    resp.headers["Retry-After"] = str(limiter.retry_after())
+    return resp, 429
+
+
+def server_busy(message: str, retry_after: int) -> Tuple[Any, int]:
+    resp = jsonify(error=message)
+    resp.headers["Retry-After"] = str(retry_after)
+    return resp, 503
+
+
 def status_payload(sess: Dict[str, Any]) -> Dict[str, Any]:
     eng: HydroGameEngine = sess["engine"]
 
@@ -46,7 +256,8 @@ def status_payload(sess: Dict[str, Any]) -> Dict[str, Any]:
         "month": eng.month,
         "crop": eng.crop,
         "language": sess.get("language", "en"),
-        "time": {"day": eng.day, "hour": eng.hour},
+        "time": {"day": eng.day, "hour": eng.hour, "minute": eng.minute},
+        "clock": {"speed": sess.get("speed", DEFAULT_SPEED), "resolution": eng.tick_minutes},
         "env": {
             "temp": eng.current_temp,
             "humidity": eng.current_humidity,
@@ -66,68 +277,28 @@ def status_payload(sess: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def _resolve_if_matches(eng: HydroGameEngine, keys: set[str]) -> None:
-    """Resolve the current prompt only if it matches one of the given keys."""
-    active = eng.active_prompt
-    if active and active.get("key") in keys:
-        eng.resolve_prompt(acted=True)
-
-
-def apply_action(eng: HydroGameEngine, action_id: str) -> str:
-    if action_id == "toggle_light":
-        new_state = not eng.light_on
-        eng.toggle_light(new_state)
-        _resolve_if_matches(eng, {"light_on"} if new_state else {"light_off"})
-        return f"Light turned {'on' if new_state else 'off'}."
-
-    if action_id == "normalize_ec":
-        eng.normalize_ec()
-        _resolve_if_matches(eng, {"ec_low", "ec_high"})
-        return "EC is normalised."
-
-    if action_id == "normalize_ph":
-        eng.normalize_ph()
-        _resolve_if_matches(eng, {"ph_out"})
-        return "pH is normalised."
-
-    if action_id == "move_inside":
-        eng.move_to_shade()
-        _resolve_if_matches(eng, {"temp_high"})
-        return "Cooled down."
-
-    if action_id == "move_outside":
-        eng.move_to_sunlight()
-        _resolve_if_matches(eng, {"temp_low"})
-        return "Heated up."
-
-    if action_id == "refill_water":
-        eng.refill_water()
-        _resolve_if_matches(eng, {"water_low"})
-        return "Reservoir refilled."
+# ---------- API ----------
 
-    if action_id == "dehumidify":
-        eng.turn_on_dehumidifier()
-        _resolve_if_matches(eng, {"humidity_high"})
-        return "Air is dehumidified."
 
-    if action_id == "spray_water":
-        eng.spray_mist()
-        _resolve_if_matches(eng, {"humidity_low"})
-        return "Air is humidified."
+@app.before_request
+def admit_request():
+    """Per-IP rate limit for API calls, and shed /status polls when the worker is saturated."""
+    if request.endpoint not in API_ENDPOINTS:
+        return None
 
-    if action_id == "next_stage":
-        try:
-            msg = eng.advance_to_next_stage()
-            return msg
-        except Exception:
-            msg = "Advanced."
-            eng.feedback.append(msg)
-            return msg
+    g.inflight = INFLIGHT.try_acquire()
+    if not g.inflight and request.endpoint == "status":
+        return server_busy("Server busy, status skipped", 2)
 
-    return "Action received."
+    if not IP_LIMIT.allow(request.remote_addr or "unknown"):
+        return too_many_requests(IP_LIMIT)
+    return None
 
 
-# ---------- API ----------
+@app.teardown_request
+def release_request(exc: Optional[BaseException]) -> None:
+    if g.pop("inflight", False):
+        INFLIGHT.release()
 
 
 @app.post("/start")
@@ -137,16 +308,46 @@ def start():
     month = data.get("month") or "January"
     crop = data.get("crop") or "Cherry Tomato"
     language = data.get("language") or "en"
+    name = str(data.get("name") or "")[:40]
+
+    if not ENGINES.knows(city, month, crop):
+        return jsonify(error="Unknown city, month or crop"), 400
+
+    room = None
+    if data.get("classroom"):
+        room = CLASSROOMS.get(data["classroom"])
+        if room is None:
+            return jsonify(error="Unknown classroom code"), 404
+
+    err = admit_start(room)
+    if err:
+        return err
 
-    eng = HydroGameEngine(city, month, crop)
-    eng.start_simulation(speed=2.5)
+    options, err = parse_clock_options(data)
+    if err:
+        return err
+    speed, resolution = options
 
     sid = make_sid()
-    SESSIONS[sid] = {
+    eng = ENGINES.spawn(city, month, crop, tick_minutes=resolution)
+    eng.add_finish_hook(ANALYTICS.hook_for(sid))
+    eng.add_finish_hook(LEADERBOARD.hook_for(sid, name, speed))
+    eng.add_prompt_hook(EXPIRY.schedule)
+
+    sess = {
         "engine": eng,
         "language": language,
+        "speed": speed,
+        "classroom": room.code if room else None,
         "created_at": int(time.time() * 1000),
+        "last_seen": int(time.time() * 1000),
     }
+    if not run_engine(sess):
+        return server_busy("Too many simulations running, try again shortly", 30)
+
+    SESSIONS[sid] = sess
+    if room:
+        room.join(sid, eng)
     return jsonify(session_id=sid)
 
 
@@ -155,6 +356,8 @@ def status():
     sess, err = get_session_or_400()
     if err:
         return err
+    if not STATUS_LIMIT.allow(request_sid()):
+        return too_many_requests(STATUS_LIMIT)
     return jsonify(status_payload(sess))
 
 
@@ -170,22 +373,13 @@ def action():
     if not action_id:
         return jsonify(error="Missing action_id"), 400
 
+    if not ACTION_LIMIT.allow(request_sid()):
+        return too_many_requests(ACTION_LIMIT)
+
     msg = apply_action(sess["engine"], action_id)
     return jsonify(ok=True, feedback=msg)
 
 
-@app.post("/prompt_result")
-def prompt_result():
-    """Called when a prompt expired without user action."""
-    sess, err = get_session_or_400()
-    if err:
-        return err
-
-    eng: HydroGameEngine = sess["engine"]
-    eng.prompt_missed()
-    return jsonify(ok=True)
-
-
 @app.post("/pause")
 def pause():
     sess, err = get_session_or_400()
@@ -194,7 +388,8 @@ def pause():
 
     eng: HydroGameEngine = sess["engine"]
     eng.pause_simulation()
-    return jsonify(ok=True, snapshot=eng.snapshot())
+    # The class code rides along so a reload from this snapshot stays in the class.
+    return jsonify(ok=True, snapshot={**eng.snapshot(), "classroom": sess.get("classroom")})
 
 
 @app.post("/resume")
@@ -205,7 +400,9 @@ def resume():
 
     eng: HydroGameEngine = sess["engine"]
     eng.resume_simulation()
-    eng.start_simulation(speed=2.5)
+    if not run_engine(sess):
+        eng.pause_simulation()
+        return server_busy("Too many simulations running, try again shortly", 30)
     return jsonify(ok=True)
 
 
@@ -219,16 +416,56 @@ def resume_from_snapshot():
     if not sid or not isinstance(snap, dict):
         return jsonify(error="sid and snapshot required"), 400
 
+    # Same speed/time-step rules as /start; the time step comes from the snapshot.
+    options, err = parse_clock_options({"speed": data.get("speed"), "resolution": snap.get("tick_minutes")})
+    if err:
+        return err
+    speed, resolution = options
+
+    if not ENGINES.knows(str(snap.get("city")), str(snap.get("month")), str(snap.get("crop"))):
+        return jsonify(error="Unknown city, month or crop"), 400
+
+    # Stay in the class the replaced session belonged to (or the one given).
+    old = SESSIONS.get(sid)
+    code = data.get("classroom") or snap.get("classroom") or (old.get("classroom") if old else None)
+    room = CLASSROOMS.get(code)
+    if code and room is None:
+        return jsonify(error="Unknown classroom code"), 404
+
+    # Continuing an existing session is free; a new sid is a new engine, admitted like /start.
+    if old is None:
+        err = admit_start(room)
+        if err:
+            return err
+
     try:
-        eng = HydroGameEngine.from_snapshot(snap, data_dir="data")
+        eng = ENGINES.spawn(snap["city"], snap["month"], snap["crop"], tick_minutes=resolution)
+        eng.restore_snapshot(snap)
     except Exception as exc:
         return jsonify(error=f"bad snapshot: {exc}"), 400
 
+    # The snapshot came from the client and could be edited, so this run is not ranked.
+    eng.add_finish_hook(ANALYTICS.hook_for(sid))
+    eng.add_prompt_hook(EXPIRY.schedule)
     SESSIONS[sid] = {
         "engine": eng,
         "language": language,
+        "speed": speed,
+        "classroom": room.code if room else None,
         "created_at": int(time.time() * 1000),
+        "last_seen": int(time.time() * 1000),
     }
+
+    if old:
+        # The run continues on the new engine: stop the old loop without exporting it.
+        old["engine"].stop_simulation(finish=False)
+        release_slot(old)
+
+    old_room = CLASSROOMS.get(old.get("classroom")) if old else None
+    if old_room and old_room is not room:
+        old_room.leave(sid)
+    if room:
+        room.join(sid, eng)
     return jsonify(ok=True)
 
 
@@ -238,23 +475,111 @@ def restart():
     if err:
         return err
 
-    eng: HydroGameEngine = sess["engine"]
-    try:
-        eng.stop_simulation()
-    except Exception:
-        pass
+    end_session(request_sid(), sess)
+    return jsonify(ok=True)
 
+
+@app.post("/classroom")
+def create_classroom():
     data = request.get_json(silent=True) or {}
-    sid = data.get("sid")
-    if sid in SESSIONS:
-        del SESSIONS[sid]
+    room = CLASSROOMS.create(name=str(data.get("name") or ""))
+    return jsonify(code=room.code)
 
-    return jsonify(ok=True)
+
+@app.get("/classroom/<code>")
+def classroom_summary(code: str):
+    """Teacher dashboard feed; cost does not depend on class size."""
+    room = CLASSROOMS.get(code)
+    if room is None:
+        return jsonify(error="Unknown classroom code"), 404
+    return jsonify(room.summary())
+
+
+def leaderboard_key(args: Dict[str, Any]) -> Tuple[Optional[BoardKey], Optional[Tuple[Any, int]]]:
+    """Board for ?city=&month=&crop=&speed=&resolution= (normal speed, 120-minute steps by default)."""
+    options, err = parse_clock_options(args)
+    if err:
+        return None, err
+    speed, resolution = options
+    city = args.get("city") or "Lahore"
+    month = args.get("month") or "January"
+    crop = args.get("crop") or "Cherry Tomato"
+    return Leaderboard.board_key(city, month, crop, speed, resolution), None
+
+
+@app.get("/leaderboard")
+def leaderboard():
+    key, err = leaderboard_key(request.args)
+    if err:
+        return err
+    n = min(max(request.args.get("n", 10, type=int), 1), 100)
+
+    city, month, crop, speed, resolution = key
+    return jsonify(
+        city=city,
+        month=month,
+        crop=crop,
+        speed=speed,
+        resolution=resolution,
+        size=LEADERBOARD.size(key),
+        top=LEADERBOARD.top(key, n),
+    )
+
+
+@app.get("/leaderboard/rank")
+def leaderboard_rank():
+    """Rank of a finished session (?sid=...) or of a hypothetical score (?yield_kg=&health=)."""
+    sid = request.args.get("sid")
+    if sid:
+        sess = SESSIONS.get(sid)
+        if sess is None:
+            return jsonify(error="Invalid or missing session id"), 400
+        eng: HydroGameEngine = sess["engine"]
+        key = Leaderboard.board_key(eng.city, eng.month, eng.crop, sess["speed"], eng.tick_minutes)
+        return jsonify(rank=LEADERBOARD.rank(key, sid), size=LEADERBOARD.size(key))
+
+    key, err = leaderboard_key(request.args)
+    if err:
+        return err
+    yield_kg = request.args.get("yield_kg", type=float)
+    health = request.args.get("health", 100.0, type=float)
+    if yield_kg is None:
+        return jsonify(error="sid or yield_kg required"), 400
+
+    rank = LEADERBOARD.rank_of_score(key, yield_kg, health)
+    return jsonify(rank=rank, size=LEADERBOARD.size(key))
+
+
+@app.get("/plan")
+def plan():
+    """Minimal action schedule for a city/month/crop, precomputed by `python planner.py`."""
+    city = request.args.get("city") or "Lahore"
+    month = request.args.get("month") or "January"
+    crop = request.args.get("crop") or "Cherry Tomato"
+
+    # The search takes seconds of CPU, so it never runs inside a request.
+    result = load_plan(city, month, crop, data_dir="data", beam_width=DEFAULT_BEAM_WIDTH)
+    if result is None:
+        return jsonify(error="No precomputed plan for this city, month and crop"), 404
+    return jsonify(result)
+
+
+@app.get("/assets/<path:filename>")
+def assets(filename: str):
+    return ASSETS.send(f"assets/{filename}", immutable=True)
+
+
+@app.get("/<page>.html")
+def page(page: str):
+    filename = f"{page}.html"
+    if filename in ASSETS.pages:
+        return ASSETS.send(filename, immutable=False)
+    return send_from_directory(app.static_folder, filename)
 
 
 @app.get("/")
 def root():
-    return send_from_directory(app.static_folder, "index.html")
+    return page("index")
 
 
 if __name__ == "__main__":
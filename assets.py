@@ -0,0 +1,67 @@
+from __future__ import annotations
+import json
+import mimetypes
+import os
+from typing import Any, Dict, List, Optional
+
+from flask import Response, request, send_from_directory
+
+from build_static import DIST_DIR, MANIFEST_NAME
+
+ONE_YEAR = 365 * 24 * 3600
+
+# Preferred order when the client accepts several encodings.
+_ENCODING_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+class AssetManifest:
+    """Output of build_static.py; empty (and falsy) when no build exists."""
+
+    def __init__(self, dist_dir: str = DIST_DIR) -> None:
+        self.dist_dir = os.path.abspath(dist_dir)
+        self.encodings: Dict[str, List[str]] = {}
+        self.pages: set[str] = set()
+
+        try:
+            with open(os.path.join(self.dist_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                data: Dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return
+
+        self.encodings = data.get("encodings", {})
+        self.pages = set(data.get("pages", []))
+
+    def __bool__(self) -> bool:
+        return bool(self.pages)
+
+    def send(self, filename: str, immutable: bool) -> Response:
+        """
+        Send a built file, picking a pre-compressed sibling when the client accepts it.
+
+        Files go through send_from_directory, so Range/conditional requests
+        are honoured and the WSGI server can use sendfile() for the body.
+        """
+        encoding: Optional[str] = None
+        served = filename
+        available = self.encodings.get(filename, [])
+        for name, suffix in _ENCODING_SUFFIXES:
+            if name in available and request.accept_encodings[name]:
+                encoding, served = name, filename + suffix
+                break
+
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        resp = send_from_directory(self.dist_dir, served, mimetype=mimetype, conditional=True)
+
+        if encoding:
+            resp.headers["Content-Encoding"] = encoding
+        if available:
+            resp.vary.add("Accept-Encoding")
+
+        if immutable:
+            resp.cache_control.no_cache = None
+            resp.cache_control.public = True
+            resp.cache_control.max_age = ONE_YEAR
+            resp.cache_control.immutable = True
+        else:
+            resp.cache_control.no_cache = True
+        return resp
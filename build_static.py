@@ -0,0 +1,123 @@
+from __future__ import annotations
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from typing import Dict, List, Optional
+
+try:  # optional: brotli copies are only written when the package is installed
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = "static"
+DIST_DIR = "dist"
+ASSET_PREFIX = "assets"
+MANIFEST_NAME = "manifest.json"
+
+# Already-compressed formats (png, mp3, ...) are copied as-is.
+COMPRESSIBLE = {".css", ".js", ".html", ".json", ".svg", ".txt"}
+
+_REF_ATTR = re.compile(r'(?P<attr>\b(?:src|href))="(?:\./)?(?P<path>[^"#?:]+)"')
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_encoded(path: str, data: bytes) -> List[str]:
+    """Write path plus .gz/.br siblings for text formats; return the encodings written."""
+    _write(path, data)
+    if os.path.splitext(path)[1] not in COMPRESSIBLE:
+        return []
+
+    encodings = []
+    _write(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    encodings.append("gzip")
+    if brotli is not None:
+        _write(path + ".br", brotli.compress(data, quality=11))
+        encodings.append("br")
+    return encodings
+
+
+def _rewrite_refs(text: str, manifest: Dict[str, str]) -> str:
+    def sub(m: "re.Match[str]") -> str:
+        hashed = manifest.get(m.group("path"))
+        if hashed is None:
+            return m.group(0)
+        return f'{m.group("attr")}="{hashed}"'
+
+    return _REF_ATTR.sub(sub, text)
+
+
+def build(static_dir: str = STATIC_DIR, dist_dir: str = DIST_DIR) -> Dict[str, object]:
+    """
+    Write content-hashed (and pre-compressed) copies of static/ into dist/.
+
+    Assets land in dist/assets/<dir>/<name>.<hash><ext>; HTML pages keep their
+    names, get their references rewritten, and pages that load script.js carry
+    the image manifest so stage images resolve to hashed URLs.
+    """
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+
+    files = sorted(
+        os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, "/")
+        for root, _, names in os.walk(static_dir)
+        for name in names
+    )
+    pages = [f for f in files if f.endswith(".html")]
+    assets = [f for f in files if not f.endswith(".html")]
+
+    manifest: Dict[str, str] = {}
+    encodings: Dict[str, List[str]] = {}
+
+    for rel in assets:
+        with open(os.path.join(static_dir, rel), "rb") as f:
+            data = f.read()
+        stem, ext = os.path.splitext(rel)
+        hashed = f"{ASSET_PREFIX}/{stem}.{_digest(data)}{ext}"
+        encodings[hashed] = _write_encoded(os.path.join(dist_dir, hashed), data)
+        manifest[rel] = hashed
+
+    images = {k: v for k, v in manifest.items() if k.startswith("img/")}
+    manifest_script = f"<script>window.ASSET_MANIFEST = {json.dumps(images, sort_keys=True)};</script>"
+
+    for rel in pages:
+        with open(os.path.join(static_dir, rel), "r", encoding="utf-8") as f:
+            source = f.read()
+        html = _rewrite_refs(source, manifest)
+        if "script.js" in source:
+            html = html.replace("</head>", f"    {manifest_script}\n  </head>", 1)
+        encodings[rel] = _write_encoded(os.path.join(dist_dir, rel), html.encode("utf-8"))
+
+    result = {"assets": manifest, "encodings": encodings, "pages": pages}
+    with open(os.path.join(dist_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build fingerprinted, pre-compressed static assets.")
+    parser.add_argument("--static-dir", default=STATIC_DIR)
+    parser.add_argument("--dist-dir", default=DIST_DIR)
+    args = parser.parse_args(argv)
+
+    result = build(args.static_dir, args.dist_dir)
+    print(
+        f"Built {len(result['assets'])} assets and {len(result['pages'])} pages into {args.dist_dir}/"
+        + ("" if brotli is not None else " (brotli not installed: gzip only)")
+    )
+
+
+if __name__ == "__main__":
+    main()
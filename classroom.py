@@ -0,0 +1,148 @@
+from __future__ import annotations
+import heapq
+import secrets
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from educator import HydroGameEngine
+
+# Unambiguous characters for join codes read out in class.
+_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+
+
+class _Member(NamedTuple):
+    stage: str
+    health: float
+    prompt_active: bool
+    yield_kg: float
+
+
+class Classroom:
+    """
+    Live aggregate over a group of learner sessions.
+
+    Each engine update hook reports one learner; only the difference to that
+    learner's previous values is applied, so reading the summary costs the
+    same for 5 or 60 learners. The minimum health is kept in a heap with
+    lazy invalidation. Only the engine a learner last joined with is
+    counted, so a session can swap engines (snapshot reload) under one id.
+    """
+
+    def __init__(self, code: str, name: str = "") -> None:
+        self.code = code
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._members: Dict[str, _Member] = {}
+        self._versions: Dict[str, int] = {}
+        self._engines: Dict[str, HydroGameEngine] = {}
+        self._min_heap: List[Tuple[float, str, int]] = []
+
+        self.stage_counts: Dict[str, int] = {}
+        self.health_sum: float = 0.0
+        self.prompts_active: int = 0
+        self.yield_sum: float = 0.0
+
+    # ---------------------- Membership ----------------------
+
+    def join(self, sid: str, eng: HydroGameEngine) -> None:
+        """Count eng for sid (replacing any engine sid joined with before)."""
+        with self._lock:
+            self._engines[sid] = eng
+        eng.add_update_hook(lambda e: self.update(sid, e))
+        self.update(sid, eng)
+
+    def leave(self, sid: str) -> None:
+        with self._lock:
+            self._engines.pop(sid, None)
+            old = self._members.pop(sid, None)
+            if old is None:
+                return
+            self._apply(old, -1)
+            self._versions[sid] = self._versions.get(sid, 0) + 1
+
+    # ---------------------- Incremental updates ----------------------
+
+    def update(self, sid: str, eng: HydroGameEngine) -> None:
+        """Update hook: fold one learner's current state into the aggregate."""
+        new = _Member(
+            stage=eng.stage,
+            health=round(float(eng.health), 2),
+            prompt_active=eng.active_prompt is not None,
+            yield_kg=float(eng.calculate_yield()["yield_kg"]),
+        )
+
+        with self._lock:
+            if self._engines.get(sid) is not eng:
+                return
+            old = self._members.get(sid)
+            if old == new:
+                return
+            if old is not None:
+                self._apply(old, -1)
+            self._apply(new, +1)
+            self._members[sid] = new
+
+            if old is None or old.health != new.health:
+                version = self._versions.get(sid, 0) + 1
+                self._versions[sid] = version
+                heapq.heappush(self._min_heap, (new.health, sid, version))
+
+    def _apply(self, m: _Member, sign: int) -> None:
+        count = self.stage_counts.get(m.stage, 0) + sign
+        if count:
+            self.stage_counts[m.stage] = count
+        else:
+            self.stage_counts.pop(m.stage, None)
+
+        self.health_sum += sign * m.health
+        self.prompts_active += sign * int(m.prompt_active)
+        self.yield_sum += sign * m.yield_kg
+
+    def _min_health(self) -> Optional[float]:
+        heap = self._min_heap
+        while heap:
+            health, sid, version = heap[0]
+            if sid in self._members and self._versions.get(sid) == version:
+                return health
+            heapq.heappop(heap)
+        return None
+
+    # ---------------------- Reporting ----------------------
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._members)
+            return {
+                "code": self.code,
+                "name": self.name,
+                "learners": size,
+                "stages": dict(self.stage_counts),
+                "health": {
+                    "mean": round(self.health_sum / size, 2) if size else None,
+                    "min": self._min_health(),
+                },
+                "active_prompts": self.prompts_active,
+                "projected_yield_kg": round(self.yield_sum, 3),
+            }
+
+
+class ClassroomRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rooms: Dict[str, Classroom] = {}
+
+    def create(self, name: str = "") -> Classroom:
+        with self._lock:
+            while True:
+                code = "".join(secrets.choice(_CODE_ALPHABET) for _ in range(6))
+                if code not in self._rooms:
+                    break
+            room = Classroom(code, name)
+            self._rooms[code] = room
+            return room
+
+    def get(self, code: Optional[str]) -> Optional[Classroom]:
+        if not code:
+            return None
+        return self._rooms.get(code.upper())
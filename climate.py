@@ -0,0 +1,93 @@
+from __future__ import annotations
+import functools
+import json
+import math
+import os
+from typing import Any, Dict, Tuple
+
+# Table resolution: one slot per 15 simulated minutes.
+SLOTS_PER_HOUR = 4
+SLOTS_PER_DAY = 24 * SLOTS_PER_HOUR
+
+# Diurnal shape: coldest just before sunrise, warmest mid-afternoon.
+COLDEST_HOUR = 6.0
+WARMEST_HOUR = 15.0
+
+# Relative humidity swing around the monthly mean, as a fraction of that mean.
+HUMIDITY_SWING = 0.15
+
+
+class ClimateTable:
+    """
+    Precomputed diurnal temperature and humidity curves for one city/month.
+
+    Built once from climate.json and shared by every engine with the same
+    city and month; lookups are a single list index.
+    """
+
+    __slots__ = ("city", "month", "outdoor_temp", "indoor_temp", "humidity")
+
+    def __init__(self, city: str, month: str, climate: Dict[str, Any]) -> None:
+        self.city = city
+        self.month = month
+
+        low = float(climate["low_temp"])
+        high = float(climate["high_temp"])
+        mean_humidity = float(climate["humidity"])
+
+        outdoor = [_diurnal_temp(slot / SLOTS_PER_HOUR, low, high) for slot in range(SLOTS_PER_DAY)]
+        self.outdoor_temp: Tuple[float, ...] = tuple(round(t, 2) for t in outdoor)
+        self.indoor_temp: Tuple[float, ...] = tuple(round(_indoor_temp(t), 2) for t in outdoor)
+
+        # Relative humidity moves opposite to temperature over the day.
+        mid = (low + high) / 2.0
+        half_range = max((high - low) / 2.0, 1e-6)
+        swing = mean_humidity * HUMIDITY_SWING
+        self.humidity: Tuple[float, ...] = tuple(
+            round(max(0.0, min(100.0, mean_humidity + swing * (mid - t) / half_range)), 2)
+            for t in outdoor
+        )
+
+    @staticmethod
+    def _slot(hour: float) -> int:
+        return int(hour * SLOTS_PER_HOUR) % SLOTS_PER_DAY
+
+    def temp_at(self, hour: float, inside: bool = False) -> float:
+        table = self.indoor_temp if inside else self.outdoor_temp
+        return table[self._slot(hour)]
+
+    def humidity_at(self, hour: float) -> float:
+        return self.humidity[self._slot(hour)]
+
+
+def _diurnal_temp(hour: float, low: float, high: float) -> float:
+    """Asymmetric cosine: warms from COLDEST_HOUR to WARMEST_HOUR, cools for the rest of the day."""
+    warming = WARMEST_HOUR - COLDEST_HOUR
+    since_coldest = (hour - COLDEST_HOUR) % 24.0
+
+    if since_coldest <= warming:
+        frac = since_coldest / warming
+        return low + (high - low) * (1.0 - math.cos(math.pi * frac)) / 2.0
+
+    frac = (since_coldest - warming) / (24.0 - warming)
+    return high - (high - low) * (1.0 - math.cos(math.pi * frac)) / 2.0
+
+
+def _indoor_temp(outdoor: float) -> float:
+    if outdoor >= 30.0:
+        return max(24.0, outdoor - 6.0)
+    if outdoor <= 10.0:
+        return min(18.0, outdoor + 4.0)
+    return outdoor - 2.0
+
+
+@functools.lru_cache(maxsize=None)
+def _load_climate(data_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(data_dir, "climate.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def get_climate_table(data_dir: str, city: str, month: str) -> ClimateTable:
+    """Shared table for (data_dir, city, month); built on first use."""
+    return ClimateTable(city, month, _load_climate(data_dir)[city][month])
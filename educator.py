@@ -1,24 +1,54 @@
 from __future__ import annotations
+import copy
 import json
-import math
 import os
 import random
 import threading
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
+
+from climate import get_climate_table
+from ratelimit import TokenBucket
+
+# Tick length the per-tick rates in data/uptake.json were written for.
+BASE_TICK_MINUTES = 120
 
 
 class HydroGameEngine:
-    def __init__(self, city: str, month: str, crop: str, data_dir: str = "data") -> None:
+    def __init__(
+        self,
+        city: str,
+        month: str,
+        crop: str,
+        data_dir: str = "data",
+        seed: Optional[int] = None,
+        tick_minutes: int = BASE_TICK_MINUTES,
+    ) -> None:
+        if tick_minutes <= 0 or (24 * 60) % tick_minutes:
+            raise ValueError(f"tick_minutes must divide a day evenly, got {tick_minutes}")
+
         self.city = city
         self.month = month
         self.crop = crop
         self.data_dir = data_dir
 
-        # Prompt settings
+        # Simulated time covered by one tick
+        self.tick_minutes: int = int(tick_minutes)
+        self.tick_hours: float = self.tick_minutes / 60.0
+        self.ticks_per_day: int = (24 * 60) // self.tick_minutes
+
+        # Noise source (seed it for reproducible headless runs)
+        self.rng = random.Random(seed)
+        self.keep_logs: bool = True
+
+        # Prompt settings. The reaction window is wall-clock time; pacing is in
+        # simulated hours so every speed and time step sees the same prompt load.
         self.prompt_ttl_ms = 15_000  # user has 15 seconds to act
-        self.min_prompt_gap_sec = 5
-        self.prompt_cooldown_ms = 8_000
+        self.min_prompt_gap_hours = 4.0
+        self.prompt_cooldown_hours = 8.0
+        # Simulated hours a prompt window spans at the default pace (15 s at 2.5 s per 2 h tick);
+        # miss penalties are scaled to the simulated time the miss actually covered.
+        self.prompt_window_hours = 12.0
 
         # Runtime flags/state
         self.paused: bool = False
@@ -26,23 +56,23 @@ class HydroGameEngine:
         self._thread: Optional[threading.Thread] = None
         self._lock = threading.RLock()
 
-        # Time-based updates
-        self.ec_update_every_hours = 3
-        self.ph_update_every_hours = 6
-        self.temp_update_hours = [8, 18]
-        self.humidity_update_hours = [12]
+        # Time-based updates (simulated hours)
+        self.ec_update_every_hours = 6
+        self.ph_update_every_hours = 12
 
         # Tick counters
         self._tick = 0
         self._last_ec_tick = -10**9
         self._last_ph_tick = -10**9
-        self._last_temp_marks = set()  # {(day, hour)}
-        self._last_humid_marks = set()
 
         # Prompt tracking
-        self.active_prompt: Optional[Dict[str, Any]] = None  # {"key","label","expires_at"}
-        self._next_prompt_allowed_at = 0
-        self._prompt_last: Dict[str, int] = {}  # key -> last_raised_ms
+        self.active_prompt: Optional[Dict[str, Any]] = None  # {"id","key","label","expires_at"}
+        self._prompt_seq = 0
+        self._prompt_hooks: list[Callable[["HydroGameEngine", Dict[str, Any]], None]] = []
+        self._paused_at_ms: Optional[int] = None
+        self._next_prompt_allowed_tick = 0
+        self._prompt_raised_tick = 0
+        self._prompt_last: Dict[str, int] = {}  # key -> tick last raised
         self._pending_penalties: Dict[str, float] = {}
 
         # Prompt penalty configuration
@@ -71,18 +101,20 @@ class HydroGameEngine:
         self.uptake: Dict[str, Any] = self._load_uptake_json()[crop]
         self.yield_info: Dict[str, Any] = self._load_json("yield.json")[crop]
 
-        # Climate envelope
+        # Climate envelope (hourly curves shared by all engines for this city/month)
+        self.climate_table = get_climate_table(data_dir, city, month)
         self.min_temp: float = float(self.climate["low_temp"])
         self.max_temp: float = float(self.climate["high_temp"])
-        self.current_temp: float = float(self.climate["mean_temp"])
-        self.current_humidity: float = float(self.climate["humidity"])
+        self.current_temp: float = self.climate_table.temp_at(0)
+        self.current_humidity: float = self.climate_table.humidity_at(0)
 
         # Clock & stage
         self.day: int = 0
         self.hour: int = 0
+        self.minute: int = 0
         self.stage: str = "Seedling"
         self.light_on: bool = False
-        self.daily_light_hours: int = 0
+        self.daily_light_hours: float = 0.0
 
         # Crop stats
         self.water_level: float = 100.0
@@ -95,6 +127,13 @@ class HydroGameEngine:
         self.feedback: list[str] = []
         self.logs: list[Dict[str, Any]] = []
 
+        # Run statistics (for analytics export)
+        self.action_counts: Dict[str, int] = {}
+        self.prompt_stats: Dict[str, Dict[str, int]] = {}  # key -> {"raised","missed"}
+        self._finish_hooks: list[Callable[["HydroGameEngine", str], None]] = []
+        self._update_hooks: list[Callable[["HydroGameEngine"], None]] = []
+        self._finished: bool = False
+
     # ---------------------- Data loading ----------------------
 
     def _load_json(self, filename: str) -> Dict[str, Any]:
@@ -110,6 +149,39 @@ class HydroGameEngine:
                 continue
         raise FileNotFoundError("Neither 'data/uptake.json' nor 'data/update.json' was found.")
 
+    # ---------------------- Cloning ----------------------
+
+    def clone(self) -> "HydroGameEngine":
+        """
+        Copy of the mutable run state, including the RNG position.
+
+        Loaded crop/climate data is shared with the original, so it must only
+        ever be replaced, never mutated in place. Hooks are not copied and the
+        copy is not running.
+        """
+        new = copy.copy(self)
+        new._lock = threading.RLock()
+        new._thread = None
+        new.running = False
+
+        new.rng = random.Random()
+        new.rng.setstate(self.rng.getstate())
+
+        new.active_prompt = dict(self.active_prompt) if self.active_prompt else None
+        new._prompt_last = dict(self._prompt_last)
+        new._pending_penalties = dict(self._pending_penalties)
+        new.penalty_table = dict(self.penalty_table)
+
+        new.notifications = list(self.notifications)
+        new.feedback = list(self.feedback)
+        new.logs = list(self.logs)
+        new.action_counts = dict(self.action_counts)
+        new.prompt_stats = {k: dict(v) for k, v in self.prompt_stats.items()}
+        new._finish_hooks = []
+        new._prompt_hooks = []
+        new._update_hooks = []
+        return new
+
     # ---------------------- Stage helpers ----------------------
 
     def get_stage(self) -> str:
@@ -129,6 +201,12 @@ class HydroGameEngine:
     def _now_ms(self) -> int:
         return int(time.time() * 1000)
 
+    def _clock_hours(self) -> float:
+        return self.hour + self.minute / 60.0
+
+    def _ticks_for_hours(self, hours: float) -> int:
+        return max(1, round(hours / self.tick_hours))
+
     # ---------------------- Prompt helpers ----------------------
 
     def _maybe_raise_prompt(self, key: str, label: str, duration_ms: Optional[int] = None) -> None:
@@ -138,20 +216,22 @@ class HydroGameEngine:
         - global spacing is respected,
         - per-key cooldown has elapsed.
         """
-        now = self._now_ms()
-
         if self.active_prompt is not None:
             return
-        if now < self._next_prompt_allowed_at:
+        if self._tick < self._next_prompt_allowed_tick:
             return
 
-        last = self._prompt_last.get(key, 0)
-        if last and (now - last) < self.prompt_cooldown_ms:
+        last = self._prompt_last.get(key)
+        if last is not None and self._tick - last < self._ticks_for_hours(self.prompt_cooldown_hours):
             return
 
         ttl = int(duration_ms if duration_ms is not None else self.prompt_ttl_ms)
-        self.active_prompt = {"key": key, "label": label, "expires_at": now + ttl}
-        self._prompt_last[key] = now
+        self._prompt_seq += 1
+        self.active_prompt = {"id": self._prompt_seq, "key": key, "label": label, "expires_at": self._now_ms() + ttl}
+        self._prompt_raised_tick = self._tick
+        self._prompt_last[key] = self._tick
+        self._count_prompt(key, "raised")
+        self._notify_prompt()
 
         if key not in self._pending_penalties:
             self._pending_penalties[key] = float(self.penalty_table.get(key, self.default_penalty))
@@ -165,7 +245,7 @@ class HydroGameEngine:
             self.feedback.append("Action handled in time.")
 
         self.active_prompt = None
-        self._next_prompt_allowed_at = self._now_ms() + self.min_prompt_gap_sec * 1000
+        self._next_prompt_allowed_tick = self._tick + self._ticks_for_hours(self.min_prompt_gap_hours)
 
     def prompt_missed(self) -> None:
         """Apply staged penalty if the prompt expired without action."""
@@ -173,7 +253,12 @@ class HydroGameEngine:
             return
 
         key = self.active_prompt["key"]
+        self._count_prompt(key, "missed")
         penalty = float(self._pending_penalties.pop(key, self.penalty_table.get(key, self.default_penalty)))
+        # Charge for the simulated time this miss stands for (its open window plus
+        # the gap after it), so slow/turbo speeds and fine/coarse time steps cost the same.
+        open_hours = (self._tick - self._prompt_raised_tick) * self.tick_hours
+        penalty *= (open_hours + self.min_prompt_gap_hours) / (self.prompt_window_hours + self.min_prompt_gap_hours)
         self.health = round(self._clamp(self.health - penalty, 0.0, 100.0), 2)
 
         self.feedback.append(
@@ -181,7 +266,36 @@ class HydroGameEngine:
         )
 
         self.active_prompt = None
-        self._next_prompt_allowed_at = self._now_ms() + self.min_prompt_gap_sec * 1000
+        self._next_prompt_allowed_tick = self._tick + self._ticks_for_hours(self.min_prompt_gap_hours)
+        self.notify_update()
+
+    def expire_prompt(self, prompt_id: int) -> bool:
+        """Apply the miss penalty if prompt_id is still active and past its deadline."""
+        with self._lock:
+            prompt = self.active_prompt
+            if prompt is None or prompt.get("id") != prompt_id:
+                return False
+            if self.paused or self._finished:
+                return False
+            if self._now_ms() < int(prompt["expires_at"]):
+                return False
+            self.prompt_missed()
+            return True
+
+    def add_prompt_hook(self, hook: Callable[["HydroGameEngine", Dict[str, Any]], None]) -> None:
+        """Register a callback run whenever a prompt is raised or its deadline moves."""
+        self._prompt_hooks.append(hook)
+
+    def _notify_prompt(self) -> None:
+        prompt = self.active_prompt
+        if prompt is None:
+            return
+        for hook in list(self._prompt_hooks):
+            hook(self, dict(prompt))
+
+    def _count_prompt(self, key: str, field: str) -> None:
+        stats = self.prompt_stats.setdefault(key, {"raised": 0, "missed": 0})
+        stats[field] += 1
 
     def _clear_prompt_cooldown_if_ok(self, key: str, is_ok: bool) -> None:
         if is_ok and key in self._prompt_last:
@@ -214,25 +328,83 @@ class HydroGameEngine:
             self.day = int(self.uptake[next_stage]["days"][0])
             self.stage = next_stage
 
-            self._tick = self.day * 24
+            self._tick = self.day * self.ticks_per_day
             self.hour = 0
+            self.minute = 0
 
             self.reset_to_stage_ideals()
             msg = f"Advanced from {current} to {next_stage}. Values reset to {next_stage} ideals."
             self.feedback.append(msg)
             return msg
 
+    # ---------------------- Run lifecycle hooks ----------------------
+
+    def add_finish_hook(self, hook: Callable[["HydroGameEngine", str], None]) -> None:
+        """Register a callback run once when the simulation loop ends."""
+        self._finish_hooks.append(hook)
+
+    @property
+    def done(self) -> bool:
+        return self.stage == "Harvestable" or self.health <= 0
+
+    def outcome(self) -> str:
+        if self.stage == "Harvestable":
+            return "completed"
+        if self.health <= 0:
+            return "dead"
+        return "abandoned"
+
+    def _run_finish_hooks(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+
+        outcome = self.outcome()
+        for hook in list(self._finish_hooks):
+            try:
+                hook(self, outcome)
+            except Exception as exc:
+                self.feedback.append(f"Finish hook error: {type(exc).__name__}: {exc}")
+
+    def add_update_hook(self, hook: Callable[["HydroGameEngine"], None]) -> None:
+        """Register a callback run after every tick, player action and missed prompt."""
+        self._update_hooks.append(hook)
+
+    def notify_update(self) -> None:
+        with self._lock:
+            for hook in list(self._update_hooks):
+                try:
+                    hook(self)
+                except Exception as exc:
+                    self.feedback.append(f"Update hook error: {type(exc).__name__}: {exc}")
+
+    def record_action(self, action_id: str) -> None:
+        with self._lock:
+            self.action_counts[action_id] = self.action_counts.get(action_id, 0) + 1
+
     # ---------------------- Public controls ----------------------
 
     def pause_simulation(self) -> None:
         with self._lock:
+            if not self.paused:
+                self._paused_at_ms = self._now_ms()
             self.paused = True
 
     def resume_simulation(self) -> None:
         with self._lock:
+            # Time spent paused does not count against an open prompt.
+            if self.paused and self._paused_at_ms is not None and self.active_prompt:
+                self.active_prompt["expires_at"] += self._now_ms() - self._paused_at_ms
+                self._notify_prompt()
+            self._paused_at_ms = None
             self.paused = False
 
-    def start_simulation(self, speed: float = 2.5) -> None:
+    def start_simulation(self, speed: float = 2.5, tick_budget: Optional[TokenBucket] = None) -> None:
+        """Run the tick loop on a thread, sleeping `speed` seconds per tick.
+
+        When a shared tick_budget is given, each tick first reserves a token
+        from it so that fast sessions cannot starve the rest of the server.
+        """
         with self._lock:
             if self.running and self._thread and self._thread.is_alive():
                 return
@@ -245,6 +417,10 @@ class HydroGameEngine:
                         if self.paused:
                             time.sleep(0.5)
                             continue
+                        if tick_budget is not None:
+                            wait = tick_budget.reserve()
+                            if wait > 0:
+                                time.sleep(wait)
                         try:
                             self.simulate_tick()
                         except Exception as exc:
@@ -259,6 +435,7 @@ class HydroGameEngine:
                         self.feedback.append(
                             f"Final yield: {result['yield_kg']} kg at {result['health']}% health."
                         )
+                    self._run_finish_hooks()
 
             self._thread = threading.Thread(
                 target=_loop,
@@ -267,14 +444,21 @@ class HydroGameEngine:
             )
             self._thread.start()
 
-    def stop_simulation(self) -> None:
+    def stop_simulation(self, finish: bool = True) -> None:
+        """Stop the tick loop; finish=False drops the finish hooks (engine replaced, run continues elsewhere)."""
         with self._lock:
             self.running = False
+            if not finish:
+                self._finished = True
 
         thread = self._thread
         if thread and thread.is_alive():
             thread.join(timeout=1.0)
 
+        # A loop that never started (or already exited) will not reach its finally-block.
+        if not (thread and thread.is_alive()):
+            self._run_finish_hooks()
+
     def toggle_light(self, status: bool) -> None:
         with self._lock:
             self.light_on = bool(status)
@@ -320,7 +504,7 @@ class HydroGameEngine:
             self.temp_offset = max(-5.0, self.temp_offset - 4.0)
             self.inside = True
             self.current_temp = round(self.current_temp - 6.0, 2)
-            self._temp_user_lock_until_tick = self._tick + 3
+            self._temp_user_lock_until_tick = self._tick + self._ticks_for_hours(6)
             self.feedback.append("Moved to shade: temperature decreased.")
 
     def move_to_sunlight(self) -> None:
@@ -328,7 +512,7 @@ class HydroGameEngine:
             self.temp_offset = min(5.0, self.temp_offset + 4.0)
             self.inside = False
             self.current_temp = round(self.current_temp + 4.0, 2)
-            self._temp_user_lock_until_tick = self._tick + 3
+            self._temp_user_lock_until_tick = self._tick + self._ticks_for_hours(6)
             self.feedback.append("Moved to sunlight: temperature increased.")
 
     # ---------------------- Simulation tick ----------------------
@@ -337,6 +521,7 @@ class HydroGameEngine:
         with self._lock:
             if self.day >= self._last_stage_end():
                 self.stage = "Harvestable"
+                self.notify_update()
                 return
 
             # Stage and uptake configuration
@@ -346,55 +531,33 @@ class HydroGameEngine:
                 {"ec_reduction": 0, "ph_drift": 0, "water_uptake": 0},
             )
 
-            # Water
-            water_drop = float(uptake.get("water_uptake", 0.0))
+            # Water (uptake rates are per BASE_TICK_MINUTES)
+            water_drop = float(uptake.get("water_uptake", 0.0)) * self.tick_minutes / BASE_TICK_MINUTES
             self.water_level = max(0.0, round(self.water_level - water_drop, 2))
 
             # EC drift
-            if (self._tick - self._last_ec_tick) >= self.ec_update_every_hours:
+            if (self._tick - self._last_ec_tick) >= self._ticks_for_hours(self.ec_update_every_hours):
                 self._last_ec_tick = self._tick
                 self._drift_ec_once()
 
             # pH drift
-            if (self._tick - self._last_ph_tick) >= self.ph_update_every_hours:
+            if (self._tick - self._last_ph_tick) >= self._ticks_for_hours(self.ph_update_every_hours):
                 self._last_ph_tick = self._tick
                 self._drift_ph_once()
 
-            # Temperature
-            if self._tick < self._temp_user_lock_until_tick:
-                pass
-            else:
-                if (self.day, self.hour) not in self._last_temp_marks and self.hour in self.temp_update_hours:
-                    self._last_temp_marks.add((self.day, self.hour))
-                    self._update_temperature_once()
-                else:
-                    self.current_temp = round(
-                        self.current_temp + random.uniform(-0.2, 0.2),
-                        2,
-                    )
+            # Temperature follows the daily curve unless the user just moved the plants
+            if self._tick >= self._temp_user_lock_until_tick:
+                self._update_temperature_once()
 
             # Humidity
-            if (self.day, self.hour) not in self._last_humid_marks and self.hour in self.humidity_update_hours:
-                self._last_humid_marks.add((self.day, self.hour))
-                self._update_humidity_once()
-            else:
-                self.current_humidity = round(
-                    self._clamp(
-                        self.current_humidity + random.uniform(-0.2, 0.2),
-                        0.0,
-                        100.0,
-                    ),
-                    2,
-                )
+            self._update_humidity_once()
 
             # Light and notifications
             self.notifications.clear()
 
             sunlight_hours = int(self.climate.get("sunlight", 0))
-            if self.hour < sunlight_hours:
-                self.daily_light_hours += 2  # each tick = 2 hours
-            elif self.light_on:
-                self.daily_light_hours += 2
+            if self._clock_hours() < sunlight_hours or self.light_on:
+                self.daily_light_hours = round(self.daily_light_hours + self.tick_hours, 2)
 
             required_light = int(self.crops.get("light_needs", [0])[0])
             if self.light_on and self.daily_light_hours >= required_light:
@@ -405,16 +568,19 @@ class HydroGameEngine:
 
             # Advance clock
             self._tick += 1
-            self.hour += 2
+            self.minute += self.tick_minutes
+            self.hour += self.minute // 60
+            self.minute %= 60
 
             if self.hour >= 24:
                 self.hour = 0
                 self.day += 1
-                self.daily_light_hours = 0
-                self._last_temp_marks.clear()
-                self._last_humid_marks.clear()
+                self.daily_light_hours = 0.0
+
+            if self.keep_logs:
+                self.logs.append(self.get_status())
 
-            self.logs.append(self.get_status())
+            self.notify_update()
 
     # ---------------------- Drift/update helpers ----------------------
 
@@ -429,30 +595,20 @@ class HydroGameEngine:
         self.ph = round(self._clamp(self.ph + drift, 3.0, 9.0), 2)
 
     def _update_temperature_once(self) -> None:
-        angle = (self.hour / 24.0) * 2.0 * math.pi
-        wave = math.sin(angle)
-        outdoor = self.min_temp + (self.max_temp - self.min_temp) * (wave + 1.0) / 2.0
-
-        if self.inside:
-            if outdoor >= 30.0:
-                indoor = max(24.0, outdoor - 6.0)
-            elif outdoor <= 10.0:
-                indoor = min(18.0, outdoor + 4.0)
-            else:
-                indoor = outdoor - 2.0
-            base = indoor
-        else:
-            base = outdoor
-
+        base = self.climate_table.temp_at(self._clock_hours(), self.inside)
         self.current_temp = round(
-            base + self.temp_offset + random.uniform(-0.5, 0.5),
+            base + self.temp_offset + self.rng.uniform(-0.2, 0.2),
             2,
         )
 
     def _update_humidity_once(self) -> None:
+        # Follow the change in the daily curve so misting/dehumidifying persists.
+        table = self.climate_table
+        now = self._clock_hours()
+        change = table.humidity_at(now) - table.humidity_at(now - self.tick_hours)
         self.current_humidity = round(
             self._clamp(
-                self.current_humidity + random.uniform(-2.0, 2.0),
+                self.current_humidity + change + self.rng.uniform(-0.2, 0.2),
                 0.0,
                 100.0,
             ),
@@ -536,7 +692,7 @@ class HydroGameEngine:
         self._clear_prompt_cooldown_if_ok("temp_high", not temp_high)
 
         # Light projection
-        remaining_sunlight = max(0, sunlight_hours - self.hour)
+        remaining_sunlight = max(0.0, sunlight_hours - self._clock_hours())
         projected_total = self.daily_light_hours + remaining_sunlight
 
         if projected_total < required_light and not self.light_on:
@@ -567,6 +723,7 @@ class HydroGameEngine:
         return {
             "day": self.day,
             "hour": self.hour,
+            "minute": self.minute,
             "stage": self.stage,
             "light_on": self.light_on,
             "light_today": self.daily_light_hours,
@@ -595,44 +752,62 @@ class HydroGameEngine:
             "crop": self.crop,
             "day": int(self.day),
             "hour": int(self.hour),
+            "minute": int(self.minute),
+            "tick_minutes": int(self.tick_minutes),
             "stage": self.stage,
             "light_on": bool(self.light_on),
             "water_level": float(self.water_level),
             "ec": float(self.ec),
             "ph": float(self.ph),
             "health": float(self.health),
-            "daily_light_hours": int(self.daily_light_hours),
+            "daily_light_hours": float(self.daily_light_hours),
             "current_temp": float(self.current_temp),
             "current_humidity": float(self.current_humidity),
             "temp_offset": float(self.temp_offset),
+            "action_counts": dict(self.action_counts),
+            "prompt_stats": {k: dict(v) for k, v in self.prompt_stats.items()},
             "paused": True,
         }
 
     @classmethod
     def from_snapshot(cls, snap: Dict[str, Any], data_dir: str = "data") -> "HydroGameEngine":
         """Rebuild engine from a previously saved snapshot (kept paused)."""
-        eng = cls(snap["city"], snap["month"], snap["crop"], data_dir=data_dir)
-
-        eng.day = int(snap.get("day", 0))
-        eng.hour = int(snap.get("hour", 0))
-        eng.stage = snap.get("stage", "Seedling")
-        eng.light_on = bool(snap.get("light_on", False))
-        eng.water_level = float(snap.get("water_level", 100.0))
-        eng.ec = float(snap.get("ec", eng.crops["ec_range"][1]))
-        eng.ph = float(snap.get("ph", eng.crops["ph_range"][1]))
-        eng.health = float(snap.get("health", 100.0))
-        eng.daily_light_hours = int(snap.get("daily_light_hours", 0))
-        eng.current_temp = float(snap.get("current_temp", eng.climate["mean_temp"]))
-        eng.current_humidity = float(
-            snap.get("current_humidity", eng.climate["humidity"])
+        eng = cls(
+            snap["city"],
+            snap["month"],
+            snap["crop"],
+            data_dir=data_dir,
+            tick_minutes=int(snap.get("tick_minutes", BASE_TICK_MINUTES)),
         )
-        eng.temp_offset = float(snap.get("temp_offset", 0.0))
-        eng.paused = True
-        eng.running = False
-        eng._thread = None
-
+        eng.restore_snapshot(snap)
         return eng
 
+    def restore_snapshot(self, snap: Dict[str, Any]) -> None:
+        """Load a snapshot's run state into this (fresh, not running) engine; it is left paused."""
+        self.day = int(snap.get("day", 0))
+        self.hour = int(snap.get("hour", 0))
+        self.minute = int(snap.get("minute", 0))
+        self.stage = snap.get("stage", "Seedling")
+        self.light_on = bool(snap.get("light_on", False))
+        self.water_level = float(snap.get("water_level", 100.0))
+        self.ec = float(snap.get("ec", self.crops["ec_range"][1]))
+        self.ph = float(snap.get("ph", self.crops["ph_range"][1]))
+        self.health = float(snap.get("health", 100.0))
+        self.daily_light_hours = float(snap.get("daily_light_hours", 0.0))
+        self.current_temp = float(snap.get("current_temp", self.climate["mean_temp"]))
+        self.current_humidity = float(
+            snap.get("current_humidity", self.climate["humidity"])
+        )
+        self.temp_offset = float(snap.get("temp_offset", 0.0))
+        self.action_counts = {str(k): int(v) for k, v in (snap.get("action_counts") or {}).items()}
+        self.prompt_stats = {
+            str(k): {"raised": int(v.get("raised", 0)), "missed": int(v.get("missed", 0))}
+            for k, v in (snap.get("prompt_stats") or {}).items()
+        }
+        self.paused = True
+        self.running = False
+        self._thread = None
+
     def save_state(self, path: str = "user_state.json") -> None:
         state = {
             "city": self.city,
@@ -640,6 +815,8 @@ class HydroGameEngine:
             "crop": self.crop,
             "day": self.day,
             "hour": self.hour,
+            "minute": self.minute,
+            "tick_minutes": self.tick_minutes,
             "stage": self.stage,
             "light_on": self.light_on,
             "water_level": self.water_level,
@@ -665,17 +842,24 @@ class HydroGameEngine:
         with open(path, "r", encoding="utf-8") as f:
             state = json.load(f)
 
-        eng = cls(state["city"], state["month"], state["crop"], data_dir=data_dir)
+        eng = cls(
+            state["city"],
+            state["month"],
+            state["crop"],
+            data_dir=data_dir,
+            tick_minutes=int(state.get("tick_minutes", BASE_TICK_MINUTES)),
+        )
 
         eng.day = int(state.get("day", 0))
         eng.hour = int(state.get("hour", 0))
+        eng.minute = int(state.get("minute", 0))
         eng.stage = state.get("stage", "Seedling")
         eng.light_on = bool(state.get("light_on", False))
         eng.water_level = float(state.get("water_level", 100.0))
         eng.ec = float(state.get("ec", eng.crops["ec_range"][1]))
         eng.ph = float(state.get("ph", eng.crops["ph_range"][1]))
         eng.health = float(state.get("health", 100.0))
-        eng.daily_light_hours = int(state.get("daily_light_hours", 0))
+        eng.daily_light_hours = float(state.get("daily_light_hours", 0.0))
         eng.current_temp = float(state.get("current_temp", eng.climate["mean_temp"]))
         eng.current_humidity = float(
             state.get("current_humidity", eng.climate["humidity"])
@@ -686,3 +870,74 @@ class HydroGameEngine:
         eng._thread = None
 
         return eng
+
+
+# ---------------------- Player actions ----------------------
+
+
+def _resolve_if_matches(eng: HydroGameEngine, keys: set[str]) -> None:
+    """Resolve the current prompt only if it matches one of the given keys."""
+    active = eng.active_prompt
+    if active and active.get("key") in keys:
+        eng.resolve_prompt(acted=True)
+
+
+def apply_action(eng: HydroGameEngine, action_id: str) -> str:
+    eng.record_action(action_id)
+    msg = _dispatch_action(eng, action_id)
+    eng.notify_update()
+    return msg
+
+
+def _dispatch_action(eng: HydroGameEngine, action_id: str) -> str:
+    if action_id == "toggle_light":
+        new_state = not eng.light_on
+        eng.toggle_light(new_state)
+        _resolve_if_matches(eng, {"light_on"} if new_state else {"light_off"})
+        return f"Light turned {'on' if new_state else 'off'}."
+
+    if action_id == "normalize_ec":
+        eng.normalize_ec()
+        _resolve_if_matches(eng, {"ec_low", "ec_high"})
+        return "EC is normalised."
+
+    if action_id == "normalize_ph":
+        eng.normalize_ph()
+        _resolve_if_matches(eng, {"ph_out"})
+        return "pH is normalised."
+
+    if action_id == "move_inside":
+        eng.move_to_shade()
+        _resolve_if_matches(eng, {"temp_high"})
+        return "Cooled down."
+
+    if action_id == "move_outside":
+        eng.move_to_sunlight()
+        _resolve_if_matches(eng, {"temp_low"})
+        return "Heated up."
+
+    if action_id == "refill_water":
+        eng.refill_water()
+        _resolve_if_matches(eng, {"water_low"})
+        return "Reservoir refilled."
+
+    if action_id == "dehumidify":
+        eng.turn_on_dehumidifier()
+        _resolve_if_matches(eng, {"humidity_high"})
+        return "Air is dehumidified."
+
+    if action_id == "spray_water":
+        eng.spray_mist()
+        _resolve_if_matches(eng, {"humidity_low"})
+        return "Air is humidified."
+
+    if action_id == "next_stage":
+        try:
+            msg = eng.advance_to_next_stage()
+            return msg
+        except Exception:
+            msg = "Advanced."
+            eng.feedback.append(msg)
+            return msg
+
+    return "Action received."
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from educator import BASE_TICK_MINUTES, HydroGameEngine
+
+TemplateKey = Tuple[str, str, str, int]  # (city, month, crop, tick_minutes)
+
+
+class EnginePool:
+    """
+    Fully initialized, never-started template engines per city/month/crop and
+    time step.
+
+    spawn() clones a template instead of running the constructor, so a new
+    session only copies its mutable state; the loaded crop and climate data
+    are shared by every session for that condition. After warm(), only the
+    city/month/crop combinations in the data files are accepted; other time
+    steps are built on first use.
+    """
+
+    def __init__(self, data_dir: str = "data") -> None:
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        self._templates: Dict[TemplateKey, HydroGameEngine] = {}
+        self._conditions: Set[Tuple[str, str, str]] = set()
+
+    def knows(self, city: str, month: str, crop: str) -> bool:
+        """Whether the combination exists in the data (always True before warm())."""
+        return not self._conditions or (city, month, crop) in self._conditions
+
+    def _template(self, city: str, month: str, crop: str, tick_minutes: int) -> HydroGameEngine:
+        key = (city, month, crop, int(tick_minutes))
+        template = self._templates.get(key)
+        if template is None:
+            if not self.knows(city, month, crop):
+                raise KeyError(f"Unknown city/month/crop: {city}/{month}/{crop}")
+            template = HydroGameEngine(city, month, crop, data_dir=self.data_dir, tick_minutes=tick_minutes)
+            with self._lock:
+                template = self._templates.setdefault(key, template)
+        return template
+
+    def spawn(
+        self,
+        city: str,
+        month: str,
+        crop: str,
+        tick_minutes: int = BASE_TICK_MINUTES,
+        seed: Optional[int] = None,
+    ) -> HydroGameEngine:
+        """Fresh engine for a new run (reseeded, so sessions do not share noise)."""
+        eng = self._template(city, month, crop, tick_minutes).clone()
+        eng.rng.seed(seed)
+        return eng
+
+    def warm(self, tick_minutes: Iterable[int] = (BASE_TICK_MINUTES,)) -> int:
+        """Build templates for every city/month in climate.json and crop in crops.json."""
+        with open(os.path.join(self.data_dir, "climate.json"), "r", encoding="utf-8") as f:
+            climate = json.load(f)
+        with open(os.path.join(self.data_dir, "crops.json"), "r", encoding="utf-8") as f:
+            crops = list(json.load(f))
+
+        conditions = {(city, month, crop) for city, months in climate.items() for month in months for crop in crops}
+        self._conditions |= conditions
+        resolutions = list(tick_minutes)
+        for city, month, crop in conditions:
+            for minutes in resolutions:
+                self._template(city, month, crop, minutes)
+        return len(self._templates)
+
+    def size(self) -> int:
+        return len(self._templates)
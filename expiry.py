@@ -0,0 +1,74 @@
+from __future__ import annotations
+import heapq
+import itertools
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+from educator import HydroGameEngine
+
+log = logging.getLogger(__name__)
+
+_Entry = Tuple[int, int, "weakref.ReferenceType[HydroGameEngine]", int]
+
+
+class PromptExpiryScheduler:
+    """
+    One deadline heap for the prompts of every session.
+
+    Engines report each raised (or re-timed) prompt through their prompt
+    hook; a single daemon thread sleeps until the earliest deadline and asks
+    that engine to apply the miss penalty. Resolved prompts are not removed
+    from the heap: engine.expire_prompt() ignores stale ids when they fire.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[_Entry] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="HydroPromptExpiry", daemon=True)
+            self._thread.start()
+
+    def schedule(self, eng: HydroGameEngine, prompt: Dict[str, Any]) -> None:
+        """Prompt hook: attach with eng.add_prompt_hook(scheduler.schedule)."""
+        entry = (int(prompt["expires_at"]), next(self._seq), weakref.ref(eng), int(prompt["id"]))
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry:
+                self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _loop(self) -> None:
+        while True:
+            due: List[_Entry] = []
+            with self._cond:
+                while not due:
+                    now = int(time.time() * 1000)
+                    while self._heap and self._heap[0][0] <= now:
+                        due.append(heapq.heappop(self._heap))
+                    if due:
+                        break
+                    timeout = (self._heap[0][0] - now) / 1000.0 if self._heap else None
+                    self._cond.wait(timeout)
+
+            # Call engines outside our lock: they hold their own lock while scheduling.
+            for _, _, ref, prompt_id in due:
+                eng = ref()
+                if eng is None:
+                    continue
+                # One failing engine (or update hook) must not stop expiry for everyone.
+                try:
+                    eng.expire_prompt(prompt_id)
+                except Exception:
+                    log.exception("Expiring prompt %s failed", prompt_id)
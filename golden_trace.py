@@ -0,0 +1,332 @@
+from __future__ import annotations
+import argparse
+import gzip
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from educator import BASE_TICK_MINUTES, HydroGameEngine
+from headless import HeadlessEngine, attentive_learner
+from planner import data_fingerprint
+
+GOLDEN_DIR = os.path.join("runtime", "golden")
+MAX_TICKS = 10_000
+
+# Each timing sample replays a trace until it has run at least this long.
+MIN_SAMPLE_SEC = 0.05
+
+
+def headless_class(engine_cls: type) -> type:
+    """Drive engine_cls on the virtual clock (mixes in HeadlessEngine unless it already is one)."""
+    if not issubclass(engine_cls, HydroGameEngine):
+        raise TypeError(f"{engine_cls.__name__} is not a HydroGameEngine")
+    if issubclass(engine_cls, HeadlessEngine):
+        return engine_cls
+    return type(f"Headless{engine_cls.__name__}", (HeadlessEngine, engine_cls), {})
+
+
+def load_engine_class(spec: str) -> type:
+    """'module:Class' -> class."""
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"engine must be given as module:Class, got {spec!r}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _slug(city: str, month: str, crop: str) -> str:
+    return "_".join(s.lower().replace(" ", "") for s in (city, month, crop))
+
+
+def _trace_path(golden_dir: str, city: str, month: str, crop: str, tick_minutes: int, seed: int) -> str:
+    return os.path.join(golden_dir, f"{_slug(city, month, crop)}_{tick_minutes}m_s{seed}.jsonl.gz")
+
+
+# ---------------------- Tracing ----------------------
+
+
+def trace(
+    eng: HeadlessEngine,
+    actions: Optional[Dict[int, str]] = None,
+    seed: int = 0,
+    max_ticks: int = MAX_TICKS,
+) -> List[Dict[str, Any]]:
+    """
+    Play one run and return a row per tick: the action taken before the tick,
+    get_status() after it and the prompts raised or missed during it.
+
+    Actions are replayed from `actions` when given, otherwise chosen by a
+    seeded learner who answers most prompts and misses the rest.
+    """
+    policy = attentive_learner(seed=seed) if actions is None else None
+    events: List[Dict[str, Any]] = []
+    eng.add_prompt_hook(lambda e, prompt: events.append({"event": "raised", **prompt}))
+    missed: Dict[str, int] = {}
+
+    rows: List[Dict[str, Any]] = []
+    for tick in range(max_ticks):
+        if eng.done:
+            break
+        action = policy(eng) if policy is not None else actions.get(tick)
+        if action:
+            eng.act(action)
+        eng.step()
+
+        for key, stats in eng.prompt_stats.items():
+            if stats["missed"] > missed.get(key, 0):
+                events.append({"event": "missed", "key": key})
+                missed[key] = stats["missed"]
+
+        rows.append({"tick": tick, "action": action, "status": eng.get_status(), "events": list(events)})
+        events.clear()
+    # JSON round trip so live rows compare equal to ones read back from disk.
+    return json.loads(json.dumps(rows))
+
+
+def replay_seconds(engine_cls: type, header: Dict[str, Any], actions: Dict[int, str], data_dir: str, loops: int = 1) -> float:
+    """Wall time of `loops` bare replays (no status capture); engines are built outside the timer."""
+    cls = headless_class(engine_cls)
+    engines = [
+        cls(header["city"], header["month"], header["crop"],
+            data_dir=data_dir, seed=header["seed"], tick_minutes=header["tick_minutes"])
+        for _ in range(loops)
+    ]
+    started = time.perf_counter()
+    for eng in engines:
+        for tick in range(header["ticks"]):
+            if eng.done:
+                break
+            action = actions.get(tick)
+            if action:
+                eng.act(action)
+            eng.step()
+    return time.perf_counter() - started
+
+
+def compare_speed(
+    engine_cls: type,
+    header: Dict[str, Any],
+    actions: Dict[int, str],
+    data_dir: str,
+    repeat: int = 5,
+    min_time: float = MIN_SAMPLE_SEC,
+) -> Tuple[float, float]:
+    """
+    Median seconds per replay for (HeadlessEngine, engine_cls).
+
+    Like timeit.autorange, the loop count is doubled until one sample takes
+    min_time (which also warms both engines up); samples then alternate
+    which engine goes first so drift and warm-up do not favour either.
+    """
+    engines = (HeadlessEngine, engine_cls)
+    loops = 1
+    while max(replay_seconds(cls, header, actions, data_dir, loops) for cls in engines) < min_time:
+        loops *= 2
+
+    samples: Tuple[List[float], List[float]] = ([], [])
+    for i in range(repeat):
+        order = (0, 1) if i % 2 == 0 else (1, 0)
+        for which in order:
+            samples[which].append(replay_seconds(engines[which], header, actions, data_dir, loops) / loops)
+    return statistics.median(samples[0]), statistics.median(samples[1])
+
+
+def first_difference(expected: Any, actual: Any, path: str = "") -> Optional[Tuple[str, Any, Any]]:
+    """(field path, expected, actual) of the first mismatch, or None."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in list(expected) + [k for k in actual if k not in expected]:
+            found = first_difference(expected.get(key), actual.get(key), f"{path}.{key}" if path else key)
+            if found:
+                return found
+        return None
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            found = first_difference(e, a, f"{path}[{i}]")
+            if found:
+                return found
+        return None
+    if expected != actual:
+        return path, expected, actual
+    return None
+
+
+# ---------------------- Golden files ----------------------
+
+
+def write_trace(path: str, header: Dict[str, Any], rows: List[Dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def read_trace(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        return header, [json.loads(line) for line in f]
+
+
+def conditions(
+    data_dir: str,
+    city: Optional[str] = None,
+    month: Optional[str] = None,
+    crop: Optional[str] = None,
+) -> Iterator[Tuple[str, str, str]]:
+    with open(os.path.join(data_dir, "climate.json"), "r", encoding="utf-8") as f:
+        climate = json.load(f)
+    with open(os.path.join(data_dir, "crops.json"), "r", encoding="utf-8") as f:
+        crops = list(json.load(f))
+
+    for c, months in climate.items():
+        if city and c != city:
+            continue
+        for m in months:
+            if month and m != month:
+                continue
+            for name in crops:
+                if crop and name != crop:
+                    continue
+                yield c, m, name
+
+
+def record(
+    data_dir: str = "data",
+    golden_dir: str = GOLDEN_DIR,
+    seeds: int = 1,
+    tick_minutes: Tuple[int, ...] = (BASE_TICK_MINUTES,),
+    **filters: Optional[str],
+) -> int:
+    """Write reference traces from the shipped engine; returns the number written."""
+    fingerprint = data_fingerprint(data_dir)
+    written = 0
+    for city, month, crop in conditions(data_dir, **filters):
+        for minutes in tick_minutes:
+            for seed in range(seeds):
+                eng = HeadlessEngine(city, month, crop, data_dir=data_dir, seed=seed, tick_minutes=minutes)
+                rows = trace(eng, seed=seed)
+                header = {
+                    "city": city,
+                    "month": month,
+                    "crop": crop,
+                    "seed": seed,
+                    "tick_minutes": minutes,
+                    "ticks": len(rows),
+                    "data": fingerprint,
+                }
+                write_trace(_trace_path(golden_dir, city, month, crop, minutes, seed), header, rows)
+                written += 1
+    return written
+
+
+def check_trace(
+    engine_cls: type,
+    path: str,
+    data_dir: str = "data",
+    repeat: int = 5,
+    min_time: float = MIN_SAMPLE_SEC,
+) -> Dict[str, Any]:
+    """Replay one golden trace on engine_cls; report the first divergence or the speedup."""
+    header, expected = read_trace(path)
+    result: Dict[str, Any] = {"trace": os.path.basename(path), "ticks": header["ticks"]}
+    if header["data"] != data_fingerprint(data_dir):
+        result["error"] = "data/ changed since this trace was recorded; re-run record"
+        return result
+
+    actions = {row["tick"]: row["action"] for row in expected if row["action"]}
+    eng = headless_class(engine_cls)(
+        header["city"], header["month"], header["crop"],
+        data_dir=data_dir, seed=header["seed"], tick_minutes=header["tick_minutes"],
+    )
+    actual = trace(eng, actions=actions, max_ticks=header["ticks"] + 1)
+
+    for want, got in zip(expected, actual):
+        found = first_difference(want, got)
+        if found:
+            field, exp, act = found
+            result["divergence"] = {"tick": want["tick"], "field": field, "expected": exp, "actual": act}
+            return result
+    if len(actual) != len(expected):
+        result["divergence"] = {
+            "tick": min(len(actual), len(expected)),
+            "field": "ticks",
+            "expected": len(expected),
+            "actual": len(actual),
+        }
+        return result
+
+    result["baseline_s"], result["candidate_s"] = compare_speed(
+        engine_cls, header, actions, data_dir, repeat=repeat, min_time=min_time,
+    )
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Record golden engine traces and check other engines against them.")
+    parser.add_argument("command", choices=("record", "check"))
+    parser.add_argument("--engine", default="educator:HydroGameEngine",
+                        help="module:Class to check (a HydroGameEngine subclass)")
+    parser.add_argument("--city")
+    parser.add_argument("--month")
+    parser.add_argument("--crop")
+    parser.add_argument("--seeds", type=int, default=1, help="seeded runs per condition when recording")
+    parser.add_argument("--tick-minutes", type=int, action="append",
+                        help=f"time step to record (repeatable; default {BASE_TICK_MINUTES})")
+    parser.add_argument("--repeat", type=int, default=5, help="timing samples per engine and trace (median is kept)")
+    parser.add_argument("--min-time", type=float, default=MIN_SAMPLE_SEC, help="minimum seconds per timing sample")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--golden-dir", default=GOLDEN_DIR)
+    args = parser.parse_args(argv)
+    filters = {"city": args.city, "month": args.month, "crop": args.crop}
+
+    if args.command == "record":
+        count = record(
+            args.data_dir,
+            args.golden_dir,
+            seeds=args.seeds,
+            tick_minutes=tuple(args.tick_minutes or (BASE_TICK_MINUTES,)),
+            **filters,
+        )
+        print(f"Recorded {count} traces into {args.golden_dir}/")
+        return
+
+    engine_cls = load_engine_class(args.engine)
+    wanted = {_slug(*condition) for condition in conditions(args.data_dir, **filters)}
+    paths = sorted(
+        os.path.join(args.golden_dir, name)
+        for name in (os.listdir(args.golden_dir) if os.path.isdir(args.golden_dir) else [])
+        if name.endswith(".jsonl.gz") and name.rsplit("_", 2)[0] in wanted
+    )
+    if not paths:
+        sys.exit(f"No golden traces in {args.golden_dir}/; run: python golden_trace.py record")
+
+    failed = 0
+    baseline = candidate = 0.0
+    for path in paths:
+        result = check_trace(engine_cls, path, args.data_dir, repeat=args.repeat, min_time=args.min_time)
+        name = result["trace"]
+        if "error" in result:
+            failed += 1
+            print(f"ERROR {name}: {result['error']}")
+        elif "divergence" in result:
+            failed += 1
+            d = result["divergence"]
+            print(f"DIFF  {name}: tick {d['tick']} {d['field']}: expected {d['expected']!r}, got {d['actual']!r}")
+        else:
+            baseline += result["baseline_s"]
+            candidate += result["candidate_s"]
+            speedup = result["baseline_s"] / result["candidate_s"] if result["candidate_s"] else float("inf")
+            print(f"OK    {name}: {result['ticks']} ticks, {speedup:.2f}x")
+
+    print(f"{len(paths) - failed}/{len(paths)} traces match {args.engine}")
+    if candidate:
+        print(f"Speedup over HeadlessEngine: {baseline / candidate:.2f}x ({baseline:.3f}s -> {candidate:.3f}s)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
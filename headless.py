@@ -0,0 +1,116 @@
+from __future__ import annotations
+import random
+from typing import Any, Callable, Dict, Optional
+
+from educator import BASE_TICK_MINUTES, HydroGameEngine, apply_action
+
+# Wall-clock milliseconds that one tick represents (matches the server's speed=2.5).
+DEFAULT_TICK_MS = 2_500
+
+Policy = Callable[["HeadlessEngine"], Optional[str]]
+
+
+class HeadlessEngine(HydroGameEngine):
+    """
+    Engine driven step by step on a virtual clock, without a thread.
+
+    Prompt deadlines are measured against the virtual clock, so a seeded run
+    is fully reproducible and as fast as simulate_tick itself.
+    """
+
+    def __init__(
+        self,
+        city: str,
+        month: str,
+        crop: str,
+        data_dir: str = "data",
+        seed: Optional[int] = 0,
+        tick_ms: int = DEFAULT_TICK_MS,
+        tick_minutes: int = BASE_TICK_MINUTES,
+    ) -> None:
+        self.clock_ms: int = 0
+        self.tick_ms: int = int(tick_ms)
+        super().__init__(city, month, crop, data_dir=data_dir, seed=seed, tick_minutes=tick_minutes)
+        self.keep_logs = False
+
+    def _now_ms(self) -> int:
+        return self.clock_ms
+
+    def step(self) -> None:
+        """Run one tick, advance the virtual clock and expire overdue prompts."""
+        self.simulate_tick()
+        self.clock_ms += self.tick_ms
+        self.expire_due_prompt()
+
+    def expire_due_prompt(self) -> None:
+        prompt = self.active_prompt
+        if prompt is not None:
+            self.expire_prompt(prompt["id"])
+
+    def act(self, action_id: str) -> str:
+        return apply_action(self, action_id)
+
+    def run(self, policy: Optional[Policy] = None, max_ticks: int = 10_000) -> Dict[str, Any]:
+        """Play until harvest/death, asking policy for at most one action per tick."""
+        for _ in range(max_ticks):
+            if self.done:
+                break
+            if policy is not None:
+                action_id = policy(self)
+                if action_id:
+                    self.act(action_id)
+            self.step()
+        return self.calculate_yield()
+
+    def fork(self) -> "HeadlessEngine":
+        """Cheap copy of the mutable state; static crop/climate data is shared."""
+        return self.clone()
+
+
+# ---------------------- Policies ----------------------
+
+# Action that clears each prompt key.
+PROMPT_RESPONSES = {
+    "water_low": "refill_water",
+    "ec_low": "normalize_ec",
+    "ec_high": "normalize_ec",
+    "ph_out": "normalize_ph",
+    "humidity_low": "spray_water",
+    "humidity_high": "dehumidify",
+    "temp_low": "move_outside",
+    "temp_high": "move_inside",
+    "light_on": "toggle_light",
+}
+
+
+def respond_to_prompts(delay_ticks: int = 1) -> Policy:
+    """Standard auto-response: answer each prompt after it has been up for delay_ticks."""
+    def policy(eng: HeadlessEngine) -> Optional[str]:
+        prompt = eng.active_prompt
+        if not prompt:
+            return None
+        raised_at = int(prompt["expires_at"]) - eng.prompt_ttl_ms
+        if eng.clock_ms - raised_at < delay_ticks * eng.tick_ms:
+            return None
+        return PROMPT_RESPONSES.get(prompt["key"])
+
+    return policy
+
+
+def attentive_learner(respond_prob: float = 0.75, delay_ticks: int = 2, seed: int = 0) -> Policy:
+    """Answer each prompt after delay_ticks with probability respond_prob, otherwise let it lapse."""
+    rng = random.Random(seed)
+    respond = respond_to_prompts(delay_ticks)
+    decisions: Dict[int, bool] = {}
+
+    def policy(eng: HeadlessEngine) -> Optional[str]:
+        prompt = eng.active_prompt
+        if not prompt:
+            return None
+        if prompt["id"] not in decisions:
+            decisions[prompt["id"]] = rng.random() < respond_prob
+        if not decisions[prompt["id"]]:
+            return None
+        return respond(eng)
+
+    return policy
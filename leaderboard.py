@@ -0,0 +1,218 @@
+from __future__ import annotations
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from educator import BASE_TICK_MINUTES, HydroGameEngine
+
+DEFAULT_PATH = os.environ.get("HYDRO_LEADERBOARD_PATH", os.path.join("runtime", "leaderboard.jsonl"))
+
+DEFAULT_SPEED = "normal"
+
+BoardKey = Tuple[str, str, str, str, int]  # (city, month, crop, speed, tick_minutes)
+SortKey = Tuple[float, float, int, str]  # (-yield_kg, -health, finished_at, entry_id)
+
+
+class _Board:
+    """Entries for one board key, kept sorted best-first and capped at max_entries."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.keys: List[SortKey] = []
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def sort_key(entry: Dict[str, Any]) -> SortKey:
+        return (-float(entry["yield_kg"]), -float(entry["health"]), int(entry["finished_at"]), entry["id"])
+
+    def insert(self, entry: Dict[str, Any]) -> Optional[int]:
+        """Add entry and return its 1-based rank, or None if it did not make the board."""
+        if entry["id"] in self.entries:
+            self.remove(entry["id"])
+
+        key = self.sort_key(entry)
+        if len(self.keys) >= self.max_entries and key >= self.keys[-1]:
+            return None
+
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.entries[entry["id"]] = entry
+
+        if len(self.keys) > self.max_entries:
+            dropped = self.keys.pop()
+            self.entries.pop(dropped[3], None)
+        return index + 1
+
+    def remove(self, entry_id: str) -> None:
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return
+        key = self.sort_key(entry)
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            self.keys.pop(index)
+
+    def rank_of_id(self, entry_id: str) -> Optional[int]:
+        entry = self.entries.get(entry_id)
+        if entry is None:
+            return None
+        return bisect.bisect_left(self.keys, self.sort_key(entry)) + 1
+
+    def rank_of_score(self, yield_kg: float, health: float) -> int:
+        """Rank a score would take (ties go ahead of existing entries)."""
+        return bisect.bisect_left(self.keys, (-float(yield_kg), -float(health))) + 1
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        return [self.entries[k[3]] for k in self.keys[:n]]
+
+
+class Leaderboard:
+    """
+    Per-(city, month, crop, speed, tick_minutes) leaderboards fed by completed
+    runs; the clock settings change difficulty, so they are ranked apart.
+
+    Inserts are appended to a JSON-lines log; after compact_every appends the
+    log is rewritten with just the live entries. Rank lookups are a bisect
+    over the sorted keys.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_PATH,
+        max_entries: int = 500,
+        compact_every: int = 200,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.compact_every = compact_every
+
+        self._lock = threading.Lock()
+        self._boards: Dict[BoardKey, _Board] = {}
+        self._appends = 0
+        self._load()
+
+    # ---------------------- Persistence ----------------------
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self._insert(json.loads(line))
+        except FileNotFoundError:
+            return
+        self.compact()
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+        self._appends += 1
+        if self._appends >= self.compact_every:
+            self._compact_locked()
+
+    def compact(self) -> None:
+        """Rewrite the log with only the entries still on a board."""
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for board in self._boards.values():
+                for key in board.keys:
+                    f.write(json.dumps(board.entries[key[3]]) + "\n")
+        os.replace(tmp, self.path)
+        self._appends = 0
+
+    # ---------------------- Updates ----------------------
+
+    def _board(self, key: BoardKey) -> _Board:
+        board = self._boards.get(key)
+        if board is None:
+            board = self._boards[key] = _Board(self.max_entries)
+        return board
+
+    @staticmethod
+    def board_key(
+        city: str,
+        month: str,
+        crop: str,
+        speed: str = DEFAULT_SPEED,
+        tick_minutes: int = BASE_TICK_MINUTES,
+    ) -> BoardKey:
+        return (city, month, crop, speed, int(tick_minutes))
+
+    def _insert(self, entry: Dict[str, Any]) -> Optional[int]:
+        # Entries logged before boards were split by clock were all normal/120-minute runs.
+        entry.setdefault("speed", DEFAULT_SPEED)
+        entry.setdefault("tick_minutes", BASE_TICK_MINUTES)
+        key = self.board_key(entry["city"], entry["month"], entry["crop"], entry["speed"], entry["tick_minutes"])
+        return self._board(key).insert(entry)
+
+    def record(self, entry_id: str, eng: HydroGameEngine, name: str = "", speed: str = DEFAULT_SPEED) -> Optional[int]:
+        """Insert a completed run; returns its rank or None if it did not qualify."""
+        result = eng.calculate_yield()
+        entry = {
+            "id": entry_id,
+            "name": name,
+            "city": eng.city,
+            "month": eng.month,
+            "crop": eng.crop,
+            "speed": speed,
+            "tick_minutes": eng.tick_minutes,
+            "yield_kg": float(result["yield_kg"]),
+            "health": float(result["health"]),
+            "finished_at": int(time.time() * 1000),
+        }
+        with self._lock:
+            rank = self._insert(entry)
+            if rank is not None:
+                self._append(entry)
+            return rank
+
+    def hook_for(self, entry_id: str, name: str = "", speed: str = DEFAULT_SPEED) -> Callable[[HydroGameEngine, str], None]:
+        """Finish hook that records the run only when the crop was grown to harvest."""
+        def hook(eng: HydroGameEngine, outcome: str) -> None:
+            # Next Stage resets the plant to ideal values, so skipped runs would top every board.
+            if outcome == "completed" and not eng.action_counts.get("next_stage"):
+                self.record(entry_id, eng, name, speed)
+
+        return hook
+
+    # ---------------------- Queries ----------------------
+
+    def top(self, key: BoardKey, n: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            board = self._boards.get(key)
+            if board is None:
+                return []
+            return [
+                {"rank": i + 1, **entry}
+                for i, entry in enumerate(board.top(n))
+            ]
+
+    def rank(self, key: BoardKey, entry_id: str) -> Optional[int]:
+        with self._lock:
+            board = self._boards.get(key)
+            return board.rank_of_id(entry_id) if board else None
+
+    def rank_of_score(self, key: BoardKey, yield_kg: float, health: float) -> int:
+        with self._lock:
+            board = self._boards.get(key)
+            return board.rank_of_score(yield_kg, health) if board else 1
+
+    def size(self, key: BoardKey) -> int:
+        with self._lock:
+            board = self._boards.get(key)
+            return len(board.keys) if board else 0
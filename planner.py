@@ -0,0 +1,248 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from headless import DEFAULT_TICK_MS, HeadlessEngine
+
+PLAN_DIR = os.path.join("runtime", "plans")
+PLAN_VERSION = 1
+DEFAULT_BEAM_WIDTH = 24
+
+# Actions the planner may schedule (next_stage skips the grow, so it is excluded).
+PLAN_ACTIONS = (
+    "refill_water",
+    "normalize_ec",
+    "normalize_ph",
+    "toggle_light",
+    "move_inside",
+    "move_outside",
+    "dehumidify",
+    "spray_water",
+)
+
+
+@dataclass
+class _Node:
+    eng: HeadlessEngine
+    schedule: Tuple[Tuple[int, int, int, str], ...]
+
+    def score(self) -> Tuple[float, int]:
+        # Higher health first, then fewer actions.
+        return (-self.eng.health, len(self.schedule))
+
+
+def _state_key(eng: HeadlessEngine) -> Tuple[Any, ...]:
+    prompt = eng.active_prompt
+    return (
+        eng._tick,
+        eng.health,
+        round(eng.water_level, 1),
+        round(eng.ec, 2),
+        round(eng.ph, 2),
+        round(eng.current_temp, 1),
+        round(eng.current_humidity, 1),
+        eng.light_on,
+        eng.daily_light_hours,
+        eng.inside,
+        eng.temp_offset,
+        eng._temp_user_lock_until_tick,
+        prompt["key"] if prompt else None,
+        prompt["expires_at"] if prompt else None,
+        eng._next_prompt_allowed_tick,
+        tuple(sorted(eng._prompt_last.items())),
+    )
+
+
+def plan(
+    city: str,
+    month: str,
+    crop: str,
+    data_dir: str = "data",
+    beam_width: int = DEFAULT_BEAM_WIDTH,
+    seed: int = 0,
+    tick_ms: int = DEFAULT_TICK_MS,
+) -> Dict[str, Any]:
+    """
+    Beam search over per-tick action choices (no-op or one action).
+
+    States reached at the same tick are memoized by a hash of the rounded
+    engine state, so equivalent branches are only expanded once. The result
+    maximizes final health (and therefore yield) and then minimizes actions.
+    """
+    root = HeadlessEngine(city, month, crop, data_dir=data_dir, seed=seed, tick_ms=tick_ms)
+    beam: List[_Node] = [_Node(root, ())]
+    expanded = 0
+
+    while not all(node.eng.done for node in beam):
+        best: Dict[Tuple[Any, ...], _Node] = {}
+        for node in beam:
+            if node.eng.done:
+                best.setdefault(("done", id(node)), node)
+                continue
+
+            for action_id in (None,) + PLAN_ACTIONS:
+                child = node.eng.fork()
+                schedule = node.schedule
+                if action_id is not None:
+                    child.act(action_id)
+                    schedule = schedule + ((node.eng._tick, node.eng.day, node.eng.hour, action_id),)
+                child.step()
+                expanded += 1
+
+                cand = _Node(child, schedule)
+                key = _state_key(child)
+                seen = best.get(key)
+                if seen is None or cand.score() < seen.score():
+                    best[key] = cand
+
+        beam = sorted(best.values(), key=_Node.score)[:beam_width]
+
+    winner = min(beam, key=_Node.score)
+    steps = [
+        {"tick": tick, "day": day, "hour": hour, "action": action_id}
+        for tick, day, hour, action_id in winner.schedule
+    ]
+    result = winner.eng.calculate_yield()
+
+    return {
+        "city": city,
+        "month": month,
+        "crop": crop,
+        "seed": seed,
+        "beam_width": beam_width,
+        "health": result["health"],
+        "yield_kg": result["yield_kg"],
+        "actions": len(steps),
+        "schedule": steps,
+        "expanded_states": expanded,
+    }
+
+
+# ---------------------- Disk cache ----------------------
+
+
+def data_fingerprint(data_dir: str) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(data_dir)):
+        if name.endswith(".json"):
+            with open(os.path.join(data_dir, name), "rb") as f:
+                digest.update(name.encode("utf-8"))
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _plan_path(city: str, month: str, crop: str, plan_dir: str) -> str:
+    slug = "_".join(s.lower().replace(" ", "") for s in (city, month, crop))
+    return os.path.join(plan_dir, f"{slug}.json")
+
+
+# One lock per plan file, so concurrent callers wait for a single search.
+_PLAN_LOCKS: Dict[str, threading.Lock] = {}
+_PLAN_LOCKS_GUARD = threading.Lock()
+
+
+def _cache_key(data_dir: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "version": PLAN_VERSION,
+        "data": data_fingerprint(data_dir),
+        "params": {k: kwargs[k] for k in sorted(kwargs)},
+    }
+
+
+def load_plan(
+    city: str,
+    month: str,
+    crop: str,
+    data_dir: str = "data",
+    plan_dir: str = PLAN_DIR,
+    **kwargs: Any,
+) -> Optional[Dict[str, Any]]:
+    """Return the cached plan if it matches the current data files, else None (never searches)."""
+    try:
+        with open(_plan_path(city, month, crop, plan_dir), "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if cached.get("cache_key") != _cache_key(data_dir, kwargs):
+        return None
+    return cached["plan"]
+
+
+def load_or_plan(
+    city: str,
+    month: str,
+    crop: str,
+    data_dir: str = "data",
+    plan_dir: str = PLAN_DIR,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Return the cached plan if it matches the current data files, otherwise compute and store it."""
+    path = _plan_path(city, month, crop, plan_dir)
+    with _PLAN_LOCKS_GUARD:
+        lock = _PLAN_LOCKS.setdefault(path, threading.Lock())
+
+    with lock:
+        cached = load_plan(city, month, crop, data_dir=data_dir, plan_dir=plan_dir, **kwargs)
+        if cached is not None:
+            return cached
+
+        result = plan(city, month, crop, data_dir=data_dir, **kwargs)
+
+        os.makedirs(plan_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=plan_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"cache_key": _cache_key(data_dir, kwargs), "plan": result}, f, indent=2)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute optimal action schedules.")
+    parser.add_argument("--city")
+    parser.add_argument("--month")
+    parser.add_argument("--crop")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--plan-dir", default=PLAN_DIR)
+    parser.add_argument("--beam-width", type=int, default=DEFAULT_BEAM_WIDTH)
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(args.data_dir, "climate.json"), "r", encoding="utf-8") as f:
+        climate = json.load(f)
+    with open(os.path.join(args.data_dir, "crops.json"), "r", encoding="utf-8") as f:
+        crops = json.load(f)
+
+    for city, months in climate.items():
+        if args.city and city != args.city:
+            continue
+        for month in months:
+            if args.month and month != args.month:
+                continue
+            for crop in crops:
+                if args.crop and crop != args.crop:
+                    continue
+                result = load_or_plan(
+                    city,
+                    month,
+                    crop,
+                    data_dir=args.data_dir,
+                    plan_dir=args.plan_dir,
+                    beam_width=args.beam_width,
+                )
+                print(
+                    f"{city:<10} {month:<10} {crop:<14} "
+                    f"health={result['health']:<6} yield={result['yield_kg']:<6} actions={result['actions']}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens/second up to `capacity`.
+
+    try_acquire() is a non-blocking check; reserve() always takes the tokens
+    (the balance may go negative) and returns how long the caller should wait,
+    which queues concurrent callers fairly without polling.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def try_acquire(self, n: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= n:
+                self._tokens -= n
+                return True
+            return False
+
+    def reserve(self, n: float = 1.0) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= n
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class KeyedRateLimiter:
+    """
+    One TokenBucket per key (session id, client IP, ...), created on demand.
+
+    At most max_keys buckets are kept; the least recently used one is dropped
+    first, so memory stays bounded and every check is O(1).
+    """
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = 10_000) -> None:
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.max_keys = int(max_keys)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str, n: float = 1.0) -> bool:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+        return bucket.try_acquire(n)
+
+    def retry_after(self) -> int:
+        """Whole seconds until one token is back (for the Retry-After header)."""
+        return max(1, math.ceil(1.0 / self.rate))
+
+
+class SlotCounter:
+    """Non-blocking counter of in-use slots with a fixed limit."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = int(limit)
+        self.in_use = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_use >= self.limit:
+                return False
+            self.in_use += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
@@ -0,0 +1,274 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from headless import HeadlessEngine, attentive_learner
+from planner import data_fingerprint
+
+CACHE_PATH = os.path.join("runtime", "sensitivity", "cache.jsonl")
+
+# Multiplicative factors explored for each parameter (1.0 = shipped data).
+PARAMETERS: Dict[str, Tuple[float, float]] = {
+    "penalty_scale": (0.5, 1.5),  # every penalty_table entry
+    "water_uptake": (0.5, 1.5),  # uptake.json, all stages
+    "ec_reduction": (0.5, 1.5),
+    "ph_drift": (0.5, 1.5),
+    "ec_range_width": (0.5, 1.5),  # crops.json ranges, scaled around their centre
+    "ph_range_width": (0.5, 1.5),
+    "temperature_width": (0.5, 1.5),
+    "humidity_width": (0.5, 1.5),
+}
+
+OUTCOMES = ("health", "yield_kg", "prompts_per_day", "missed")
+
+_RANGE_KEYS = {
+    "ec_range_width": "ec_range",
+    "ph_range_width": "ph_range",
+    "temperature_width": "temperature",
+    "humidity_width": "humidity",
+}
+
+
+def _scaled_range(values: List[float], factor: float) -> List[float]:
+    lo, hi = float(values[0]), float(values[1])
+    mid, half = (lo + hi) / 2.0, (hi - lo) / 2.0 * factor
+    return [round(mid - half, 3), round(mid + half, 3)]
+
+
+def apply_factors(eng: HeadlessEngine, factors: Dict[str, float]) -> None:
+    """Perturb a fresh engine's parameters; dicts are replaced, never mutated in place."""
+    eng.penalty_table = {k: v * factors.get("penalty_scale", 1.0) for k, v in eng.penalty_table.items()}
+    eng.default_penalty *= factors.get("penalty_scale", 1.0)
+
+    eng.uptake = {
+        stage: {
+            **values,
+            **{
+                key: float(values.get(key, 0.0)) * factors.get(key, 1.0)
+                for key in ("water_uptake", "ec_reduction", "ph_drift")
+            },
+        }
+        for stage, values in eng.uptake.items()
+    }
+
+    crops = dict(eng.crops)
+    for name, key in _RANGE_KEYS.items():
+        if name in factors:
+            crops[key] = _scaled_range(crops[key], factors[name])
+    eng.crops = crops
+
+    # Initial EC/pH come from the (possibly rescaled) ranges.
+    eng.ec = float(crops["ec_range"][1])
+    eng.ph = float(crops["ph_range"][1])
+
+
+def run_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """One headless grow at one parameter point (runs in a worker process)."""
+    eng = HeadlessEngine(task["city"], task["month"], task["crop"], data_dir=task["data_dir"], seed=task["seed"])
+    apply_factors(eng, task["factors"])
+
+    policy = attentive_learner(respond_prob=task["respond_prob"], seed=task["seed"])
+    result = eng.run(policy)
+
+    days = max(1, eng.day)
+    raised = sum(s["raised"] for s in eng.prompt_stats.values())
+    missed = sum(s["missed"] for s in eng.prompt_stats.values())
+    return {
+        "health": float(result["health"]),
+        "yield_kg": float(result["yield_kg"]),
+        "prompts_per_day": raised / days,
+        "missed": float(missed),
+    }
+
+
+def _task_key(task: Dict[str, Any], fingerprint: str) -> str:
+    payload = json.dumps({**task, "data": fingerprint}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+# ---------------------- Sampling ----------------------
+
+
+def one_at_a_time(names: List[str], levels: int) -> List[Dict[str, float]]:
+    """Sweep each parameter over `levels` evenly spaced factors with the rest at 1.0."""
+    points: List[Dict[str, float]] = [{}]
+    for name in names:
+        lo, hi = PARAMETERS[name]
+        for i in range(levels):
+            factor = lo + (hi - lo) * i / max(1, levels - 1)
+            points.append({name: round(factor, 4)})
+    return points
+
+
+def latin_hypercube(names: List[str], samples: int, seed: int = 0) -> List[Dict[str, float]]:
+    """Each parameter's range is cut into `samples` strata, each stratum used exactly once."""
+    rng = random.Random(seed)
+    columns: Dict[str, List[float]] = {}
+    for name in names:
+        lo, hi = PARAMETERS[name]
+        strata = [(i + rng.random()) / samples for i in range(samples)]
+        rng.shuffle(strata)
+        columns[name] = [round(lo + (hi - lo) * u, 4) for u in strata]
+    return [{name: columns[name][i] for name in names} for i in range(samples)]
+
+
+# ---------------------- Analysis ----------------------
+
+
+def _pearson(xs: List[float], ys: List[float]) -> float:
+    n = len(xs)
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    sxx = sum((x - mx) ** 2 for x in xs)
+    syy = sum((y - my) ** 2 for y in ys)
+    if sxx == 0 or syy == 0:
+        return 0.0
+    return sxy / math.sqrt(sxx * syy)
+
+
+def analyze(
+    names: List[str],
+    points: List[Dict[str, float]],
+    means: List[Dict[str, float]],
+    isolate: bool = False,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Per parameter and outcome: the Pearson correlation between the factor and
+    the outcome, plus the outcome change between the lowest and highest
+    factor seen. With isolate=True (one-at-a-time sweeps) only the points
+    that vary that parameter alone are used.
+    """
+    report: Dict[str, Dict[str, float]] = {}
+    for name in names:
+        rows = [
+            (p, m) for p, m in zip(points, means)
+            if not isolate or all(key == name for key in p)
+        ]
+        xs = [p.get(name, 1.0) for p, _ in rows]
+        lo_x, hi_x = min(xs), max(xs)
+        row: Dict[str, float] = {}
+        for outcome in OUTCOMES:
+            ys = [m[outcome] for _, m in rows]
+            row[f"r_{outcome}"] = round(_pearson(xs, ys), 3)
+            lo_ys = [y for x, y in zip(xs, ys) if x == lo_x]
+            hi_ys = [y for x, y in zip(xs, ys) if x == hi_x]
+            row[f"delta_{outcome}"] = round(sum(hi_ys) / len(hi_ys) - sum(lo_ys) / len(lo_ys), 3)
+        report[name] = row
+    return report
+
+
+def run(
+    points: List[Dict[str, float]],
+    conditions: List[Tuple[str, str, str]],
+    seeds: int = 3,
+    respond_prob: float = 0.75,
+    data_dir: str = "data",
+    cache_path: str = CACHE_PATH,
+    workers: Optional[int] = None,
+) -> List[Dict[str, float]]:
+    """Mean outcomes per point over every condition and seed, reusing cached runs."""
+    fingerprint = data_fingerprint(data_dir)
+    cache: Dict[str, Dict[str, float]] = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                cache[entry["key"]] = entry["result"]
+
+    tasks: List[List[Dict[str, Any]]] = []
+    for factors in points:
+        tasks.append([
+            {
+                "city": city,
+                "month": month,
+                "crop": crop,
+                "seed": seed,
+                "factors": factors,
+                "respond_prob": respond_prob,
+                "data_dir": data_dir,
+            }
+            for city, month, crop in conditions
+            for seed in range(seeds)
+        ])
+
+    flat = [t for group in tasks for t in group]
+    keys = [_task_key(t, fingerprint) for t in flat]
+    todo = [(k, t) for k, t in zip(keys, flat) if k not in cache]
+    todo = list({k: t for k, t in todo}.items())
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(run_task, [t for _, t in todo], chunksize=max(1, len(todo) // 64))
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            with open(cache_path, "a", encoding="utf-8") as f:
+                for (key, _), result in zip(todo, results):
+                    cache[key] = result
+                    f.write(json.dumps({"key": key, "result": result}) + "\n")
+
+    means: List[Dict[str, float]] = []
+    i = 0
+    for group in tasks:
+        rows = [cache[keys[i + j]] for j in range(len(group))]
+        i += len(group)
+        means.append({o: sum(r[o] for r in rows) / len(rows) for o in OUTCOMES})
+    return means
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sensitivity of health, prompts and yield to engine parameters.")
+    parser.add_argument("--method", choices=("oat", "lhs"), default="lhs",
+                        help="one-at-a-time sweep or Latin hypercube sample")
+    parser.add_argument("--samples", type=int, default=32, help="LHS sample count")
+    parser.add_argument("--levels", type=int, default=5, help="OAT levels per parameter")
+    parser.add_argument("--params", nargs="*", choices=sorted(PARAMETERS), default=sorted(PARAMETERS))
+    parser.add_argument("--city", default="Lahore")
+    parser.add_argument("--month", default="June")
+    parser.add_argument("--crop", action="append", help="crop to include (repeatable; default all)")
+    parser.add_argument("--seeds", type=int, default=3, help="grows per point and crop")
+    parser.add_argument("--respond-prob", type=float, default=0.75, help="chance the simulated learner answers a prompt")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--cache", default=CACHE_PATH)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(args.data_dir, "crops.json"), "r", encoding="utf-8") as f:
+        crops = args.crop or list(json.load(f))
+    conditions = [(args.city, args.month, crop) for crop in crops]
+
+    if args.method == "oat":
+        points = one_at_a_time(args.params, args.levels)
+    else:
+        points = latin_hypercube(args.params, args.samples)
+
+    means = run(
+        points,
+        conditions,
+        seeds=args.seeds,
+        respond_prob=args.respond_prob,
+        data_dir=args.data_dir,
+        cache_path=args.cache,
+        workers=args.workers,
+    )
+    report = analyze(args.params, points, means, isolate=args.method == "oat")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    header = ["parameter"] + [f"{kind}_{o}" for o in OUTCOMES for kind in ("r", "delta")]
+    widths = [max(len(h), 18) if i == 0 else len(h) for i, h in enumerate(header)]
+    print("  ".join(h.ljust(w) for h, w in zip(header, widths)))
+    for name, row in sorted(report.items(), key=lambda kv: -abs(kv[1]["r_health"])):
+        cells = [name] + [str(row[h]) for h in header[1:]]
+        print("  ".join(c.ljust(w) for c, w in zip(cells, widths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,7 @@ const I18N = {
 
 const App = {
   sid: null,
-  params: { city: null, month: null, crop: null, language: "en" },
+  params: { city: null, month: null, crop: null, language: "en", speed: "normal", resolution: 120 },
   pollingTimer: null,
   pollingAbort: null,
   online: false,
@@ -102,14 +102,16 @@ function bindSetupSubmit() {
     const month = $("#monthSelect")?.value;
     const crop = $("#cropSelect")?.value;
     const language = $("#langSelect")?.value || "en";
+    const speed = $("#speedSelect")?.value || "normal";
+    const resolution = Number($("#resolutionSelect")?.value || 120);
 
-    App.params = { city, month, crop, language };
+    App.params = { city, month, crop, language, speed, resolution };
 
     try {
       const res = await fetch(API.START, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ city, month, crop, language }),
+        body: JSON.stringify({ city, month, crop, language, speed, resolution }),
       });
       if (!res.ok) throw new Error(`Start failed (${res.status})`);
 
@@ -149,6 +151,8 @@ function startPolling() {
       const res = await fetch(`${API.STATUS}?sid=${encodeURIComponent(App.sid)}`, {
         signal: App.pollingAbort.signal,
       });
+      // Shed or rate-limited by the server: keep the last view and try the next poll.
+      if (res.status === 429 || res.status === 503) return;
       if (!res.ok) throw new Error(`Status failed (${res.status})`);
 
       const data = await res.json();
@@ -204,13 +208,19 @@ function updateDashboardFromLayout(data) {
   if (top[3]) top[3].textContent = `Temperature: ${toFixedOrDash(data.env?.temp, 1)} °C`;
   if (top[4]) top[4].textContent = `Yield: ${toFixedOrDash(data.plant?.yield, 2) ?? "—"} kg`;
 
-  if (bottom[0]) bottom[0].textContent = `Hour: ${data.time?.hour ?? "—"}`;
+  if (bottom[0]) bottom[0].textContent = `Hour: ${formatClock(data.time)}`;
   if (bottom[1]) bottom[1].textContent = `pH: ${data.env?.ph ?? "—"}`;
   if (bottom[2]) bottom[2].textContent = `Water: ${data.env?.water ?? "—"}%`;
   if (bottom[3]) bottom[3].textContent = `Status: ${data.plant?.stage ?? "—"}`;
   if (bottom[4]) bottom[4].textContent = `Health: ${Math.round(data.plant?.health ?? 0)}%`;
 }
 
+function formatClock(time) {
+  if (time?.hour == null) return "—";
+  if (!time.minute) return String(time.hour);
+  return `${time.hour}:${String(time.minute).padStart(2, "0")}`;
+}
+
 function renderFeedback(list) {
   // kept for compatibility if needed
   const box = $("#feedbackList");
@@ -230,11 +240,7 @@ async function runAction(action_id) {
   if (!App.sid || App.paused) return;
 
   try {
-    if (promptTimer) {
-      clearTimeout(promptTimer);
-      promptTimer = null;
-    }
-    activePromptKey = null;
+    clearPromptTimeout();
 
     const res = await fetch(API.ACTION, {
       method: "POST",
@@ -291,16 +297,19 @@ function bindPauseButton() {
       }
 
       stopPolling();
+      clearPromptTimeout();
       App.paused = true;
       savePausedSession();
       setPauseButtonUI(true);
     } else {
       try {
-        await fetch(API.RESUME, {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ sid: App.sid }),
-        });
+        const body = JSON.stringify({ sid: App.sid });
+        const headers = { "Content-Type": "application/json" };
+        const res = await fetch(API.RESUME, { method: "POST", headers, body });
+        // A long pause ends the server session; rebuild it from the saved snapshot.
+        if (res.status === 400 && (await tryAutoResumeFromSnapshot())) {
+          await fetch(API.RESUME, { method: "POST", headers, body });
+        }
       } catch (_) {
         // ignore network errors here
       }
@@ -363,9 +372,11 @@ async function tryAutoResumeFromSnapshot() {
   if (!App.sid || !snapRaw) return false;
 
   let language = "en";
+  let speed = "normal";
   try {
     const params = JSON.parse(localStorage.getItem(STORE.PARAMS)) || {};
     language = params.language || "en";
+    speed = params.speed || "normal";
   } catch (_) {
     language = "en";
   }
@@ -378,6 +389,7 @@ async function tryAutoResumeFromSnapshot() {
         sid: App.sid,
         snapshot: JSON.parse(snapRaw),
         language,
+        speed,
       }),
     });
     const data = await res.json();
@@ -528,37 +540,31 @@ function animateControlBox(box) {
 }
 
 // ----------------- Prompt expiry -----------------
+function clearPromptTimeout() {
+  if (promptTimer) {
+    clearTimeout(promptTimer);
+    promptTimer = null;
+  }
+  activePromptKey = null;
+}
+
 function schedulePromptTimeout(pa) {
   if (!pa) {
-    if (promptTimer) {
-      clearTimeout(promptTimer);
-      promptTimer = null;
-    }
-    activePromptKey = null;
+    clearPromptTimeout();
     return;
   }
 
-  if (activePromptKey === pa.key) return;
+  // Same prompt with the same deadline: keep the running timer. A resume moves
+  // expires_at, which re-arms it.
+  const promptKey = `${pa.id}:${pa.expires_at}`;
+  if (activePromptKey === promptKey) return;
 
-  activePromptKey = pa.key;
-  if (promptTimer) {
-    clearTimeout(promptTimer);
-    promptTimer = null;
-  }
+  clearPromptTimeout();
+  activePromptKey = promptKey;
 
+  // The server applies the penalty at expires_at; this timer only shows the message.
   const msLeft = Math.max(0, (pa.expires_at || 0) - Date.now());
-  promptTimer = setTimeout(async () => {
-    try {
-      if (App.sid) {
-        await fetch("prompt_result", {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ sid: App.sid }),
-        });
-      }
-    } catch (_) {
-      // ignore
-    }
+  promptTimer = setTimeout(() => {
     addFeedback(`Missed: ${pa.label}`);
   }, msLeft);
 }
@@ -571,12 +577,17 @@ function slug(s) {
     .replace(/[^a-z0-9_]/g, "");
 }
 
+// Hashed URL from the build manifest (injected into the page), else the plain path
+function assetUrl(path) {
+  return (window.ASSET_MANIFEST && window.ASSET_MANIFEST[path]) || path;
+}
+
 function findImagePath(crop, stage) {
   const chosenCrop = crop && STAGE_MAP[crop] ? crop : "Cherry Tomato";
   const order = STAGE_MAP[chosenCrop];
 
   const knownStage = order.includes(stage) ? stage : order[order.length - 1];
-  return `img/${slug(chosenCrop)}_${slug(knownStage)}.png`;
+  return assetUrl(`img/${slug(chosenCrop)}_${slug(knownStage)}.png`);
 }
 
 function updatePlantImage(data) {